@@ -3,13 +3,29 @@ Friday AI — Master Agent
 Two arms: CMD (system) + Browser (Chrome extension)
 Intent memory, multi-step planner, risk gating, habit learning.
 """
-import os, json, time, platform
-from groq import Groq
+import os, sys, json, time, platform, subprocess, importlib, itertools
+from pathlib import Path
+from collections import deque
+from types import SimpleNamespace
+from functools import lru_cache
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor, wait
+try:
+    import orjson                        # optional: faster tool-argument (de)serialisation
+    _loads = orjson.loads
+    def _dumps_sorted(obj):
+        return orjson.dumps(obj, default=str, option=orjson.OPT_SORT_KEYS)
+except ImportError:
+    _loads = json.loads
+    def _dumps_sorted(obj):
+        return json.dumps(obj, sort_keys=True, default=str)
 from core.risk import classify_tool, Risk
+from core.tool_cache import wrap_tools
 from memory.memory import infer_preferences, record_tool_choice, build_context
 
 # ── System arm imports ─────────────────────────────────────────────────────────
 from ops.system_ops import (
+    R, _run, OS,
     get_volume, set_volume, mute_volume,
     list_wifi_networks, connect_wifi, disconnect_wifi, save_wifi_creds, get_saved_wifi,
     hotspot_create, change_dns, speed_test, network_scan, net_info,
@@ -29,29 +45,104 @@ from ops.system_ops import (
     run_python, safe_shell,
 )
 
+# ── Lazily imported arms ──────────────────────────────────────────────────────
+# The web and browser tool modules are only imported when one of their tools is
+# first called; until then each name below is a _LazyTool stand-in.
+
+class _LazyTool:
+    """Callable proxy for a tool function — imports its module on first call."""
+    __slots__ = ("mod", "attr", "fn")
+
+    def __init__(self, mod, attr):
+        self.mod, self.attr, self.fn = mod, attr, None
+
+    def __call__(self, *args, **kwargs):
+        if self.fn is None:
+            self.fn = getattr(importlib.import_module(self.mod), self.attr)
+        return self.fn(*args, **kwargs)
+
+    def __repr__(self):
+        return f"<lazy {self.mod}.{self.attr}>"
+
+
+def _web(attr):     return _LazyTool("tools.web_tools", attr)
+def _browser(attr): return _LazyTool("tools.browser_tools", attr)
+
+
 # ── Web tools ──────────────────────────────────────────────────────────────────
-from tools.web_tools import (
-    web_search, fetch_page, get_weather, get_datetime,
-    calculate, get_stock, wikipedia, convert_currency, convert_units,
-    generate_qr, api_test, start_local_server,
-)
+web_search           = _web("web_search")
+fetch_page           = _web("fetch_page")
+get_weather          = _web("get_weather")
+get_datetime         = _web("get_datetime")
+calculate            = _web("calculate")
+get_stock            = _web("get_stock")
+wikipedia            = _web("wikipedia")
+convert_currency     = _web("convert_currency")
+convert_units        = _web("convert_units")
+generate_qr          = _web("generate_qr")
+api_test             = _web("api_test")
+start_local_server   = _web("start_local_server")
 
 # ── Browser arm ────────────────────────────────────────────────────────────────
-from tools.browser_tools import (
-    navigate, go_back, go_forward, reload, get_url, get_title,
-    click, fill_input, fill_form, select_option, check_box,
-    scroll, hover, press_key, wait_for,
-    get_text, get_html, read_page, extract_table, find_element, get_links, get_form_fields,
-    get_tabs, open_tab, close_tab, focus_tab, close_other_tabs, find_tab, close_tabs_by_domain,
-    get_cookies, get_storage, trigger_download, run_js, dom_op,
-    auto_login, save_login, list_logins,
-    start_recording, stop_recording, replay_session, list_sessions_info,
-    save_form, fill_saved_form, ask_about_page,
-    # Extension skills
-    youtube_play, youtube_pause, youtube_resume, youtube_mute, youtube_unmute,
-    youtube_volume, youtube_speed, youtube_skip, youtube_back, youtube_fullscreen,
-    youtube_info, youtube_next, youtube_like, youtube_subscribe,
-)
+navigate             = _browser("navigate")
+go_back              = _browser("go_back")
+go_forward           = _browser("go_forward")
+reload               = _browser("reload")
+get_url              = _browser("get_url")
+get_title            = _browser("get_title")
+click                = _browser("click")
+fill_input           = _browser("fill_input")
+fill_form            = _browser("fill_form")
+select_option        = _browser("select_option")
+check_box            = _browser("check_box")
+scroll               = _browser("scroll")
+hover                = _browser("hover")
+press_key            = _browser("press_key")
+wait_for             = _browser("wait_for")
+get_text             = _browser("get_text")
+get_html             = _browser("get_html")
+read_page            = _browser("read_page")
+extract_table        = _browser("extract_table")
+find_element         = _browser("find_element")
+get_links            = _browser("get_links")
+get_form_fields      = _browser("get_form_fields")
+get_tabs             = _browser("get_tabs")
+open_tab             = _browser("open_tab")
+close_tab            = _browser("close_tab")
+focus_tab            = _browser("focus_tab")
+close_other_tabs     = _browser("close_other_tabs")
+find_tab             = _browser("find_tab")
+close_tabs_by_domain = _browser("close_tabs_by_domain")
+get_cookies          = _browser("get_cookies")
+get_storage          = _browser("get_storage")
+trigger_download     = _browser("trigger_download")
+run_js               = _browser("run_js")
+dom_op               = _browser("dom_op")
+auto_login           = _browser("auto_login")
+save_login           = _browser("save_login")
+list_logins          = _browser("list_logins")
+start_recording      = _browser("start_recording")
+stop_recording       = _browser("stop_recording")
+replay_session       = _browser("replay_session")
+list_sessions_info   = _browser("list_sessions_info")
+save_form            = _browser("save_form")
+fill_saved_form      = _browser("fill_saved_form")
+ask_about_page       = _browser("ask_about_page")
+# Extension skills
+youtube_play         = _browser("youtube_play")
+youtube_pause        = _browser("youtube_pause")
+youtube_resume       = _browser("youtube_resume")
+youtube_mute         = _browser("youtube_mute")
+youtube_unmute       = _browser("youtube_unmute")
+youtube_volume       = _browser("youtube_volume")
+youtube_speed        = _browser("youtube_speed")
+youtube_skip         = _browser("youtube_skip")
+youtube_back         = _browser("youtube_back")
+youtube_fullscreen   = _browser("youtube_fullscreen")
+youtube_info         = _browser("youtube_info")
+youtube_next         = _browser("youtube_next")
+youtube_like         = _browser("youtube_like")
+youtube_subscribe    = _browser("youtube_subscribe")
 
 # ── Memory & DB tools ──────────────────────────────────────────────────────────
 from memory.memory import (
@@ -62,7 +153,7 @@ from memory.memory import (
     get_habits_summary,
 )
 from db.database import (
-    log_cmd, get_history, get_undoable, mark_undone, db_stats,
+    log_cmd_async, get_history_lines, get_undoable, mark_undone, db_stats,
     save_alias, get_alias, list_aliases, bump_alias,
     save_snippet, get_snippet, list_snippets,
     vault_save, vault_get, vault_list,
@@ -75,10 +166,7 @@ from db.database import (
 # SYSTEM PROMPT
 # ══════════════════════════════════════════════════════════════════════════════
 
-def _build_system_prompt(session_ctx=None):
-    ctx = build_context()
-    session_part = session_ctx.as_prompt_context() if session_ctx else ""
-    return f"""You are Friday, a powerful AI system agent running on {platform.system()}.
+_PROMPT_HEADER = f"""You are Friday, a powerful AI system agent running on {platform.system()}.
 
 You have TWO arms:
 1. CMD ARM — control the local computer (files, processes, wifi, bluetooth, packages, docker, cron, etc.)
@@ -103,13 +191,33 @@ NATURAL FOLLOW-UPS:
 - "mute it", "turn it up", "a bit lower" → use active context.
 - Short inputs like "50", "100", "louder", "mute" resolve from last action.
 - Always prefer the active session context over asking for clarification.
+"""
 
-ACTIVE SESSION:
-{session_part if session_part else "(no recent actions)"}
+_CONTEXT_TTL  = 2.0
+_context_memo = (float("-inf"), "")   # (timestamp, build_context() value)
+
+def _cached_context():
+    """build_context() hits the DB three times — reuse the result for a couple of seconds."""
+    global _context_memo
+    now = time.monotonic()
+    if now - _context_memo[0] > _CONTEXT_TTL:
+        _context_memo = (now, build_context())
+    return _context_memo[1]
 
-MEMORY CONTEXT:
-{ctx if ctx else "(no active reminders or goals)"}
-"""
+
+@lru_cache(maxsize=32)
+def _render_prompt(signature, session_part, ctx):
+    return (f"{_PROMPT_HEADER}\n"
+            f"ACTIVE SESSION:\n{session_part if session_part else '(no recent actions)'}\n\n"
+            f"MEMORY CONTEXT:\n{ctx if ctx else '(no active reminders or goals)'}\n")
+
+
+def _build_system_prompt(session_ctx=None):
+    ctx = _cached_context()
+    if session_ctx is None:
+        return _render_prompt(None, "", ctx)
+    # as_prompt_context() memoizes itself on the same signature
+    return _render_prompt(session_ctx.signature(), session_ctx.as_prompt_context(), ctx)
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -132,7 +240,7 @@ def _i(desc): return {"type":"integer","description":desc}
 def _b(desc): return {"type":"boolean","description":desc}
 def _n(desc): return {"type":"number","description":desc}
 
-TOOLS = [
+TOOLS = (
     # ── VOLUME ──
     _tf("volume","Volume control — action: get|set|mute|unmute  level(0-100) required only for set",
         {"action":_s("get|set|mute|unmute"),"level":{"type":"integer","description":"0-100, only used when action is set"}},["action"]),
@@ -323,276 +431,246 @@ TOOLS = [
     _tf("db_stats","Database statistics",{}),
     _tf("undo_last","Undo last recoverable operation",{}),
     _tf("set_pref","Save a preference",{"key":_s(""),"value":_s("")},["key","value"]),
-]
+)
+
+_BASE_TOOL_NAMES = frozenset(t["function"]["name"] for t in TOOLS)
+
+# The schema builders are only needed to construct TOOLS
+del _tf, _s, _i, _b, _n
+
+# ── Tool scopes ────────────────────────────────────────────────────────────────
+# With TOOL_SCOPE=arm only the active arm's schemas (plus web, core and tools
+# already used this session) are sent, shrinking the request. Default: all.
+_BROWSER_SCHEMAS = frozenset({
+    "navigate", "browser_nav", "click", "fill_input", "fill_form", "select_option",
+    "check_box", "scroll", "hover", "press_key", "wait_for", "read_page", "page_extract",
+    "find_element", "get_links", "get_form_fields", "browser_tab", "find_tab", "page_data",
+    "trigger_download", "dom_op", "auto_login", "login_manager", "browser_session",
+    "form_memory", "ask_about_page", "youtube",
+})
+_WEB_SCHEMAS = frozenset({
+    "web_search", "fetch_page", "get_weather", "get_datetime", "calculate", "get_stock",
+    "wikipedia", "convert_currency", "convert_units", "generate_qr", "api_test",
+    "start_local_server",
+})
+_CORE_SCHEMAS = frozenset({
+    "remember_fact", "recall_facts", "show_facts", "save_note", "show_notes", "find_note",
+    "add_reminder_nlp", "show_reminders", "done_reminder", "create_goal", "progress_goal",
+    "complete_goal", "show_goals", "get_habits_summary", "alias", "snippet", "vault",
+    "watcher", "skill_help", "skills_cmd", "diagnose_skill_cmd", "validate_js_skill_cmd",
+    "show_history", "db_stats", "undo_last", "set_pref",
+})
+
+def _schema_arm(name):
+    if name in _BROWSER_SCHEMAS: return "browser"
+    if name in _WEB_SCHEMAS:     return "web"
+    if name in _CORE_SCHEMAS:    return "core"
+    return "cmd"
+
+TOOL_ARM     = {t["function"]["name"]: _schema_arm(t["function"]["name"]) for t in TOOLS}
+TOOLS_BY_ARM = {arm: tuple(t for t in TOOLS if TOOL_ARM[t["function"]["name"]] == arm)
+                for arm in ("cmd", "browser", "web", "core")}
+TOOL_SCOPE   = os.getenv("TOOL_SCOPE", "all").lower()
 
 
 # ══════════════════════════════════════════════════════════════════════════════
-# GROUPED TOOL DISPATCH FUNCTIONS
+# GROUPED TOOL ACTION TABLES
 # ══════════════════════════════════════════════════════════════════════════════
 
-def _youtube_dispatch(a):
-    from ops.system_ops import R
-    act = a.get("action","").lower()
-    dispatch = {
-        "play":        youtube_play,
-        "pause":       youtube_pause,
-        "resume":      youtube_resume,
-        "mute":        youtube_mute,
-        "unmute":      youtube_unmute,
-        "fullscreen":  youtube_fullscreen,
-        "info":        youtube_info,
-        "next":        youtube_next,
-        "like":        youtube_like,
-        "subscribe":   youtube_subscribe,
-    }
-    if act in dispatch:
-        return dispatch[act]()
-    if act in ("volume", "set_volume"):
-        return youtube_volume(int(a.get("level", 50)))
-    if act in ("speed", "set_speed"):
-        return youtube_speed(float(a.get("rate", 1.0)))
-    if act in ("skip", "forward"):
-        return youtube_skip(int(a.get("seconds", 10)))
-    if act in ("back", "rewind"):
-        return youtube_back(int(a.get("seconds", 10)))
-    return R(False, f"Unknown youtube action: {act}. Use: play|pause|resume|mute|unmute|volume|speed|skip|back|fullscreen|info|next|like|subscribe", "youtube")
-
-
-def _bluetooth_dispatch(a):
-    from ops.system_ops import R
-    act = a.get("action","").lower()
-    dev = a.get("device","")
-    if act == "scan":        return scan_bluetooth()
-    if act == "connect":     return connect_bluetooth(dev)
-    if act == "disconnect":  return disconnect_bluetooth(dev)
-    if act == "pair":        return pair_bluetooth(dev, a.get("name", dev))
-    if act == "list":        return list_bt_devices()
-    return R(False, f"Unknown bluetooth action: {act}. Use: scan|connect|disconnect|pair|list", "bluetooth")
-
-
-def _browser_tab_dispatch(a):
-    from ops.system_ops import R
-    act = a.get("action","").lower()
-    if act == "list":           return get_tabs()
-    if act == "open":           return open_tab(a.get("url","about:blank"))
-    if act == "close":          return close_tab(a.get("index"))
-    if act == "focus":          return focus_tab(a["index"])
-    if act == "close_others":   return close_other_tabs()
-    if act == "close_by_domain":return close_tabs_by_domain(a["domain"])
-    return R(False, f"Unknown browser_tab action: {act}. Use: list|open|close|focus|close_others|close_by_domain", "browser_tab")
-
-
-def _browser_session_dispatch(a):
-    from ops.system_ops import R
-    act = a.get("action","").lower()
-    if act == "start":   return start_recording(a.get("name", f"session_{int(__import__('time').time())}"))
-    if act == "stop":    return stop_recording()
-    if act == "replay":  return replay_session(a["name"])
-    if act == "list":    return list_sessions_info()
-    return R(False, f"Unknown browser_session action: {act}. Use: start|stop|replay|list", "browser_session")
-
-
-def _alias_dispatch(a):
-    from ops.system_ops import R
-    act = a.get("action","").lower()
-    if act == "save":
-        save_alias(a["name"], a["command"], a.get("description",""))
-        return R(True, f"Alias '{a['name']}' saved → {a['command']}", "db")
-    if act == "run":
-        return _run_alias(a)
-    if act == "list":
-        rows = list_aliases()
-        body = "\n".join(f"  {r['name']:<20} {r['command'][:60]}" for r in rows) if rows else "No aliases saved"
-        return R(True, "Aliases:\n" + body, "db")
-    return R(False, f"Unknown alias action: {act}. Use: save|run|list", "alias")
-
-
-def _snippet_dispatch(a):
-    from ops.system_ops import R
-    act = a.get("action","").lower()
-    if act == "save":
-        save_snippet(a["name"], a["content"], a.get("language","text"))
-        return R(True, f"Snippet '{a['name']}' saved", "db")
-    if act == "get":
-        s = get_snippet(a["name"])
-        return R(bool(s), s["content"] if s else f"Snippet '{a['name']}' not found", "db")
-    if act == "list":
-        rows = list_snippets()
-        body = "\n".join(f"  {r['name']:<20} [{r['language']}]" for r in rows) if rows else "No snippets"
-        return R(True, "Snippets:\n" + body, "db")
-    return R(False, f"Unknown snippet action: {act}. Use: save|get|list", "snippet")
-
-
-def _vault_dispatch(a):
-    from ops.system_ops import R
-    act = a.get("action","").lower()
-    if act == "save":
-        vault_save(a["label"], a["username"], a["password"], a.get("url",""), a.get("notes",""))
-        return R(True, f"Vault: '{a['label']}' saved", "db")
-    if act == "get":
-        v = vault_get(a["label"])
-        return R(bool(v), f"🔐 {v['label']}: {v['username']} / {v['password']}" if v else f"Not found: {a['label']}", "db")
-    if act == "list":
-        rows = vault_list()
-        body = "\n".join(f"  {r['label']:<20} {r['username']}" for r in rows) if rows else "Vault is empty"
-        return R(True, "Vault:\n" + body, "db")
-    return R(False, f"Unknown vault action: {act}. Use: save|get|list", "vault")
-
-
-def _watcher_dispatch(a):
-    from ops.system_ops import R
-    act = a.get("action","").lower()
-    if act == "add":
-        add_watcher(a["process"], a.get("auto_restart", False), a.get("alert", True))
-        return R(True, f"Watching: {a['process']}", "db")
-    if act == "remove":
-        remove_watcher(a["process"])
-        return R(True, f"Stopped watching: {a['process']}", "db")
-    if act == "list":
-        rows = list_watchers()
-        body = "\n".join(f"  {r['process']} (restart={r['auto_restart']})" for r in rows) if rows else "No active watchers"
-        return R(True, "Watchers:\n" + body, "db")
-    return R(False, f"Unknown watcher action: {act}. Use: add|remove|list", "watcher")
-
-
-def _skill_help_dispatch(a):
-    t = a.get("type","").lower()
-    if t == "template":           return _skill_template(a)
-    if t == "extension_template": return _extension_skill_template(a)
-    if t == "open_folder":        return _open_skill_folder(a)
-    from ops.system_ops import R
-    return R(False, "Unknown type. Use: template|extension_template|open_folder", "skill_help")
-
-
-def _page_extract_dispatch(a):
-    t = a.get("type","").lower()
-    if t == "text":        return get_text(a.get("selector"))
-    if t == "html":        return get_html(a.get("selector"), a.get("outer", False))
-    if t == "table":       return extract_table(a.get("selector"), a.get("index", 0))
-    if t == "links":       return get_links(a.get("selector"))
-    if t == "form_fields": return get_form_fields()
-    from ops.system_ops import R
-    return R(False, f"Unknown extract type: {t}. Use: text|html|table|links|form_fields", "page_extract")
+def _z(f):
+    """Adapter for zero-arg handlers — f is bound as a default, so the call is a LOAD_FAST."""
+    return lambda a, f=f: f()
+
+
+_YT_TABLE = {
+    "play":        _z(youtube_play),
+    "pause":       _z(youtube_pause),
+    "resume":      _z(youtube_resume),
+    "mute":        _z(youtube_mute),
+    "unmute":      _z(youtube_unmute),
+    "fullscreen":  _z(youtube_fullscreen),
+    "info":        _z(youtube_info),
+    "next":        _z(youtube_next),
+    "like":        _z(youtube_like),
+    "subscribe":   _z(youtube_subscribe),
+    "volume":      lambda a, f=youtube_volume: f(int(a.get("level", 50))),
+    "speed":       lambda a, f=youtube_speed: f(float(a.get("rate", 1.0))),
+    "skip":        lambda a, f=youtube_skip: f(int(a.get("seconds", 10))),
+    "back":        lambda a, f=youtube_back: f(int(a.get("seconds", 10))),
+}
+_YT_TABLE["set_volume"] = _YT_TABLE["volume"]
+_YT_TABLE["set_speed"]  = _YT_TABLE["speed"]
+_YT_TABLE["forward"]    = _YT_TABLE["skip"]
+_YT_TABLE["rewind"]     = _YT_TABLE["back"]
+
+
+_BT_TABLE = {
+    "scan":        _z(scan_bluetooth),
+    "connect":     lambda a, f=connect_bluetooth: f(a.get("device","")),
+    "disconnect":  lambda a, f=disconnect_bluetooth: f(a.get("device","")),
+    "pair":        lambda a, f=pair_bluetooth: f(a.get("device",""), a.get("name", a.get("device",""))),
+    "list":        _z(list_bt_devices),
+}
+
+
+_TAB_TABLE = {
+    "list":            _z(get_tabs),
+    "open":            lambda a, f=open_tab: f(a.get("url","about:blank")),
+    "close":           lambda a, f=close_tab: f(a.get("index")),
+    "focus":           lambda a, f=focus_tab: f(a["index"]),
+    "close_others":    _z(close_other_tabs),
+    "close_by_domain": lambda a, f=close_tabs_by_domain: f(a["domain"]),
+}
+
+
+_session_ids = itertools.count(int(time.time()))   # default recording names, unique per process
+
+_SESSION_TABLE = {
+    "start":   lambda a, f=start_recording: f(a["name"] if "name" in a else f"session_{next(_session_ids)}"),
+    "stop":    _z(stop_recording),
+    "replay":  lambda a, f=replay_session: f(a["name"]),
+    "list":    _z(list_sessions_info),
+}
+
+
+# Row formatters for the list actions — bound once instead of an f-string per row
+_fmt_alias,   _alias_cols   = "  {:<20} {:.60}".format,   itemgetter("name", "command")
+_fmt_snippet, _snippet_cols = "  {:<20} [{}]".format,     itemgetter("name", "language")
+_fmt_vault,   _vault_cols   = "  {:<20} {}".format,       itemgetter("label", "username")
+_fmt_watcher, _watcher_cols = "  {} (restart={})".format, itemgetter("process", "auto_restart")
+
+
+def _listing(title, rows, fmt, cols, empty):
+    """'Title:' header plus one line per row, built with a single join."""
+    if not rows: return R(True, f"{title}:\n{empty}", "db")
+    return R(True, "\n".join([f"{title}:", *[fmt(*cols(r)) for r in rows]]), "db")
+
+
+def _alias_save(a):
+    save_alias(a["name"], a["command"], a.get("description",""))
+    return R(True, f"Alias '{a['name']}' saved → {a['command']}", "db")
+
+def _run_alias(a):
+    alias = get_alias(a["name"])
+    if not alias: return R(False, f"Alias '{a['name']}' not found","db")
+    bump_alias(a["name"])
+    ok, out = _run(alias["command"])
+    return R(ok, out, alias["command"])
+
+def _alias_list(a):
+    return _listing("Aliases", list_aliases(), _fmt_alias, _alias_cols, "No aliases saved")
+
+_ALIAS_TABLE = {"save": _alias_save, "run": _run_alias, "list": _alias_list}
+
+
+def _snippet_save(a):
+    save_snippet(a["name"], a["content"], a.get("language","text"))
+    return R(True, f"Snippet '{a['name']}' saved", "db")
+
+def _snippet_get(a):
+    s = get_snippet(a["name"])
+    return R(bool(s), s["content"] if s else f"Snippet '{a['name']}' not found", "db")
+
+def _snippet_list(a):
+    return _listing("Snippets", list_snippets(), _fmt_snippet, _snippet_cols, "No snippets")
+
+_SNIPPET_TABLE = {"save": _snippet_save, "get": _snippet_get, "list": _snippet_list}
+
+
+def _vault_save(a):
+    vault_save(a["label"], a["username"], a["password"], a.get("url",""), a.get("notes",""))
+    return R(True, f"Vault: '{a['label']}' saved", "db")
+
+def _vault_get(a):
+    v = vault_get(a["label"])
+    return R(bool(v), f"🔐 {v['label']}: {v['username']} / {v['password']}" if v else f"Not found: {a['label']}", "db")
+
+def _vault_list(a):
+    return _listing("Vault", vault_list(), _fmt_vault, _vault_cols, "Vault is empty")
+
+_VAULT_TABLE = {"save": _vault_save, "get": _vault_get, "list": _vault_list}
+
+
+def _watcher_add(a):
+    add_watcher(a["process"], a.get("auto_restart", False), a.get("alert", True))
+    return R(True, f"Watching: {a['process']}", "db")
+
+def _watcher_remove(a):
+    remove_watcher(a["process"])
+    return R(True, f"Stopped watching: {a['process']}", "db")
+
+def _watcher_list(a):
+    return _listing("Watchers", list_watchers(), _fmt_watcher, _watcher_cols, "No active watchers")
+
+_WATCHER_TABLE = {"add": _watcher_add, "remove": _watcher_remove, "list": _watcher_list}
+
+
+_EXTRACT_TABLE = {
+    "text":        lambda a, f=get_text: f(a.get("selector")),
+    "html":        lambda a, f=get_html: f(a.get("selector"), a.get("outer", False)),
+    "table":       lambda a, f=extract_table: f(a.get("selector"), a.get("index", 0)),
+    "links":       lambda a, f=get_links: f(a.get("selector")),
+    "form_fields": _z(get_form_fields),
+}
 
 
 # ══════════════════════════════════════════════════════════════════════════════
 # SKILL MANAGEMENT HELPERS
 # ══════════════════════════════════════════════════════════════════════════════
 
-def _skill_template(a):
-    """Show skill template - opens file or displays in terminal."""
-    from pathlib import Path
-    import platform
-    from ops.system_ops import R
-    
-    template_path = Path(__file__).parent.parent / "SKILL_TEMPLATE.md"
-    
-    if not template_path.exists():
-        return R(False, "SKILL_TEMPLATE.md not found", "skill_template")
-    
-    # Try to open in default editor
-    OS = platform.system().lower()
+# Templates are static — read once at import and keep the terminal preview ready
+_SKILL_TEMPLATE_PATH     = Path(__file__).parent.parent / "SKILL_TEMPLATE.md"
+_EXT_SKILL_TEMPLATE_PATH = Path(__file__).parent.parent / "EXTENSION_SKILL_TEMPLATE.md"
+
+def _template_preview(path):
+    """First 50 lines of a template plus a size footer, or None if unreadable."""
     try:
-        if OS == "linux":
-            import subprocess
-            subprocess.Popen(["xdg-open", str(template_path)])
-        elif OS == "darwin":
-            import subprocess
-            subprocess.Popen(["open", str(template_path)])
-        elif OS == "windows":
-            import os
-            os.startfile(str(template_path))
-        return R(True, f"Opened skill template: {template_path}", "skill_template")
-    except:
-        # Fallback: show first 50 lines
-        content = template_path.read_text()
-        lines = content.split("\n")[:50]
-        preview = "\n".join(lines) + f"\n\n... [{len(content)} chars total]\n\nFull template: {template_path}"
-        return R(True, preview, "skill_template")
+        content = path.read_text()
+    except OSError:
+        return None
+    head = "\n".join(content.split("\n", 50)[:50])
+    return head + f"\n\n... [{len(content)} chars total]\n\nFull template: {path}"
 
+_TEMPLATE_PREVIEW = {p: _template_preview(p) for p in (_SKILL_TEMPLATE_PATH, _EXT_SKILL_TEMPLATE_PATH)}
 
-def _extension_skill_template(a):
-    """Show extension skill template for browser automation."""
-    from pathlib import Path
-    import platform
-    from ops.system_ops import R
-    
-    template_path = Path(__file__).parent.parent / "EXTENSION_SKILL_TEMPLATE.md"
-    
-    if not template_path.exists():
-        return R(False, "EXTENSION_SKILL_TEMPLATE.md not found", "extension_skill_template")
-    
-    # Try to open in default editor
-    OS = platform.system().lower()
+
+_OPENER = {"darwin": ["open"], "windows": None}.get(OS, ["xdg-open"])
+
+def _open_path(path):
+    """Open a file or folder with the desktop's default handler."""
+    if _OPENER is None:
+        os.startfile(str(path))
+    else:
+        subprocess.Popen(_OPENER + [str(path)])
+
+
+def _open_or_preview(path, label, tool):
+    """Open a template in the default editor, falling back to its cached preview."""
+    preview = _TEMPLATE_PREVIEW[path]
+    if preview is None:
+        return R(False, f"{path.name} not found", tool)
     try:
-        if OS == "linux":
-            import subprocess
-            subprocess.Popen(["xdg-open", str(template_path)])
-        elif OS == "darwin":
-            import subprocess
-            subprocess.Popen(["open", str(template_path)])
-        elif OS == "windows":
-            import os
-            os.startfile(str(template_path))
-        return R(True, f"Opened extension skill template: {template_path}", "extension_skill_template")
-    except:
-        # Fallback: show first 50 lines
-        content = template_path.read_text()
-        lines = content.split("\n")[:50]
-        preview = "\n".join(lines) + f"\n\n... [{len(content)} chars total]\n\nFull template: {template_path}"
-        return R(True, preview, "extension_skill_template")
+        _open_path(path)
+        return R(True, f"Opened {label}: {path}", tool)
+    except Exception:
+        return R(True, preview, tool)
+
+
+def _skill_template(a):
+    """Show skill template - opens file or displays in terminal."""
+    return _open_or_preview(_SKILL_TEMPLATE_PATH, "skill template", "skill_template")
 
 
 def _extension_skill_template(a):
-    """Show extension skill template - for browser automation skills."""
-    from pathlib import Path
-    import platform
-    from ops.system_ops import R
-    
-    template_path = Path(__file__).parent.parent / "EXTENSION_SKILL_TEMPLATE.md"
-    
-    if not template_path.exists():
-        return R(False, "EXTENSION_SKILL_TEMPLATE.md not found", "extension_skill_template")
-    
-    # Try to open in default editor
-    OS = platform.system().lower()
-    try:
-        if OS == "linux":
-            import subprocess
-            subprocess.Popen(["xdg-open", str(template_path)])
-        elif OS == "darwin":
-            import subprocess
-            subprocess.Popen(["open", str(template_path)])
-        elif OS == "windows":
-            import os
-            os.startfile(str(template_path))
-        return R(True, f"Opened extension skill template: {template_path}", "extension_skill_template")
-    except:
-        # Fallback: show first 50 lines
-        content = template_path.read_text()
-        lines = content.split("\n")[:50]
-        preview = "\n".join(lines) + f"\n\n... [{len(content)} chars total]\n\nFull template: {template_path}"
-        return R(True, preview, "extension_skill_template")
+    """Show extension skill template for browser automation."""
+    return _open_or_preview(_EXT_SKILL_TEMPLATE_PATH, "extension skill template", "extension_skill_template")
 
 
 def _open_skill_folder(a):
     """Open skills folder in file manager."""
-    from pathlib import Path
-    import platform
-    import subprocess
-    from ops.system_ops import R
-    
     skills_dir = Path(__file__).parent.parent / "skills"
-    OS = platform.system().lower()
-    
     try:
-        if OS == "linux":
-            subprocess.Popen(["xdg-open", str(skills_dir)])
-        elif OS == "darwin":
-            subprocess.Popen(["open", str(skills_dir)])
-        elif OS == "windows":
-            import os
-            os.startfile(str(skills_dir))
+        _open_path(skills_dir)
         return R(True, f"Opened skills folder: {skills_dir}", "open_skill_folder")
     except Exception as e:
         return R(False, f"Could not open folder: {e}\nPath: {skills_dir}", "open_skill_folder")
@@ -600,24 +678,16 @@ def _open_skill_folder(a):
 
 def _list_skills(a):
     """List all loaded skills."""
-    from skills.registry import list_loaded_skills, get_tool_defs
-    from ops.system_ops import R
+    from skills.registry import list_loaded_skills, get_tool_defs, get_skill_status
 
     skills = list_loaded_skills()
     if not skills:
         return R(True, "No custom skills loaded. Add .py files to skills/ folder.", "list_skills")
 
-    # Count tools per skill
+    # The registry already records each skill's accepted tools — no name matching needed
     all_tool_defs = get_tool_defs()
-    tool_counts = {}
-    for skill_name in skills:
-        count = sum(1 for t in all_tool_defs if skill_name in str(t.get("function", {}).get("name", "")))
-        tool_counts[skill_name] = count
-
     lines = [f"Loaded skills ({len(skills)}):\n"]
-    for skill in skills:
-        count = tool_counts.get(skill, 0)
-        lines.append(f"  📦 {skill:<25} {count} tools")
+    lines += [f"  📦 {skill:<25} {len(get_skill_status(skill)['tools'])} tools" for skill in skills]
 
     lines.append(f"\nTotal tools from skills: {len(all_tool_defs)}")
     lines.append(f"\nTo add skills: drop .py files in skills/ folder")
@@ -629,7 +699,6 @@ def _list_skills(a):
 def _reload_skills_cmd(a):
     """Reload all skills - validates each one before loading."""
     from skills.registry import reload_skills, all_skills_summary
-    from ops.system_ops import R
     skill_tools, skill_handlers = reload_skills()
     summary = all_skills_summary()
     return R(True, f"Reload complete.\n\n{summary}", "reload_skills")
@@ -638,7 +707,6 @@ def _reload_skills_cmd(a):
 def _skill_status_cmd(a):
     """Show full validation status for all loaded skills."""
     from skills.registry import all_skills_summary, list_failed_skills
-    from ops.system_ops import R
     summary = all_skills_summary()
     failed  = list_failed_skills()
     if failed:
@@ -648,8 +716,7 @@ def _skill_status_cmd(a):
 
 def _diagnose_skill_cmd(a):
     """Show detailed validation report for one skill."""
-    from skills.registry import skill_report, get_skill_status
-    from ops.system_ops import R
+    from skills.registry import skill_report, get_skill_status, list_loaded_skills
     name   = a.get("skill_name", "").strip()
     report = skill_report(name)
     status = get_skill_status(name)
@@ -657,7 +724,7 @@ def _diagnose_skill_cmd(a):
     if not status:
         return R(False,
                  f"Skill '{name}' not found.\n"
-                 f"Available: {', '.join(__import__('skills.registry', fromlist=['list_loaded_skills']).list_loaded_skills())}",
+                 f"Available: {', '.join(list_loaded_skills())}",
                  "diagnose_skill")
 
     extra = ""
@@ -675,9 +742,7 @@ def _diagnose_skill_cmd(a):
 
 def _validate_js_skill_cmd(a):
     """Validate a JS extension skill file before installing it."""
-    from pathlib import Path
     from skills.registry import validate_js_skill_file
-    from ops.system_ops import R
     path = Path(a.get("path", "")).expanduser()
     if not path.exists():
         return R(False, f"File not found: {path}", "validate_js")
@@ -687,53 +752,190 @@ def _validate_js_skill_cmd(a):
     return R(True, report, "validate_js")
 
 
+_SKILL_HELP_TABLE = {
+    "template":           _skill_template,
+    "extension_template": _extension_skill_template,
+    "open_folder":        _open_skill_folder,
+}
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# GROUPED TOOL ROUTING
+# ══════════════════════════════════════════════════════════════════════════════
+
+# tool → (selector arg, action table, unknown-action message)
+_GROUPS = {
+    "youtube":         ("action", _YT_TABLE,         "Unknown youtube action: {}. Use: play|pause|resume|mute|unmute|volume|speed|skip|back|fullscreen|info|next|like|subscribe"),
+    "bluetooth":       ("action", _BT_TABLE,         "Unknown bluetooth action: {}. Use: scan|connect|disconnect|pair|list"),
+    "browser_tab":     ("action", _TAB_TABLE,        "Unknown browser_tab action: {}. Use: list|open|close|focus|close_others|close_by_domain"),
+    "browser_session": ("action", _SESSION_TABLE,    "Unknown browser_session action: {}. Use: start|stop|replay|list"),
+    "alias":           ("action", _ALIAS_TABLE,      "Unknown alias action: {}. Use: save|run|list"),
+    "snippet":         ("action", _SNIPPET_TABLE,    "Unknown snippet action: {}. Use: save|get|list"),
+    "vault":           ("action", _VAULT_TABLE,      "Unknown vault action: {}. Use: save|get|list"),
+    "watcher":         ("action", _WATCHER_TABLE,    "Unknown watcher action: {}. Use: add|remove|list"),
+    "skill_help":      ("type",   _SKILL_HELP_TABLE, "Unknown type. Use: template|extension_template|open_folder"),
+    "page_extract":    ("type",   _EXTRACT_TABLE,    "Unknown extract type: {}. Use: text|html|table|links|form_fields"),
+}
+
+# One flat (tool, action) → handler table for every grouped tool. Keys are interned
+# so a lookup with an interned action resolves on identity, not a char compare.
+ROUTES = {(sys.intern(tool), sys.intern(act)): fn
+          for tool, (_, table, _) in _GROUPS.items() for act, fn in table.items()}
+
+
+def _grouped(tool):
+    """TOOL_MAP handler for a grouped tool — a single ROUTES lookup on (tool, action)."""
+    field, _, unknown = _GROUPS[tool]
+    tool = sys.intern(tool)
+    def _call(a):
+        act = sys.intern(a.get(field,"").lower())
+        handler = ROUTES.get((tool, act))
+        return handler(a) if handler else R(False, unknown.format(act), tool)
+    return _call
+
+_youtube_dispatch         = _grouped("youtube")
+_bluetooth_dispatch       = _grouped("bluetooth")
+_browser_tab_dispatch     = _grouped("browser_tab")
+_browser_session_dispatch = _grouped("browser_session")
+_alias_dispatch           = _grouped("alias")
+_snippet_dispatch         = _grouped("snippet")
+_vault_dispatch           = _grouped("vault")
+_watcher_dispatch         = _grouped("watcher")
+_skill_help_dispatch      = _grouped("skill_help")
+_page_extract_dispatch    = _grouped("page_extract")
+
+
 # ══════════════════════════════════════════════════════════════════════════════
 # LOCATION HELPER
 # ══════════════════════════════════════════════════════════════════════════════
 
+_LOCATION_FILE = Path.home() / ".friday" / "location.json"   # last known good lookup
+
+class _StaleR(R):
+    """Last-known fallback result — fine to return, never cached by tool_cache."""
+    __slots__ = ()
+    cacheable = False
+
+
 def _get_location():
     """Get geographic location from IP using ipinfo.io (no API key required)."""
-    from ops.system_ops import R
+    from tools.web_tools import _req   # shared keep-alive session
+    ok, r = _req("https://ipinfo.io/json", timeout=6)
+    stale = ""
     try:
-        import urllib.request, json
-        with urllib.request.urlopen("https://ipinfo.io/json", timeout=6) as resp:
-            data = json.loads(resp.read())
+        if ok:
+            data = r.json()
+            try:   # best-effort — an unwritable home must not fail a good lookup
+                _LOCATION_FILE.parent.mkdir(parents=True, exist_ok=True)
+                _LOCATION_FILE.write_text(json.dumps(data))
+            except OSError:
+                pass
+        else:
+            # Offline — fall back to the last successful lookup rather than failing
+            data  = json.loads(_LOCATION_FILE.read_text())
+            stale = "\n(last known location — lookup failed)"
         city    = data.get("city", "?")
         region  = data.get("region", "?")
         country = data.get("country", "?")
         loc     = data.get("loc", "?,?")
         org     = data.get("org", "")
-        out = f"Location: {city}, {region}, {country}\nCoordinates: {loc}\nISP/Org: {org}"
-        return R(True, out, "ipinfo.io")
+        out = f"Location: {city}, {region}, {country}\nCoordinates: {loc}\nISP/Org: {org}{stale}"
+        return (_StaleR if stale else R)(True, out, "ipinfo.io")
     except Exception as e:
-        return R(False, f"Could not determine location: {e}", "ipinfo.io")
+        return R(False, f"Could not determine location: {e if ok else r}", "ipinfo.io")
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# BRANCHING TOOL HANDLERS
+# ══════════════════════════════════════════════════════════════════════════════
+# Small selector sets (2–5 cases) — one dict lookup on the selector arg; anything
+# not in the table goes to the fallback, exactly as the old trailing else did.
+
+def _selector(field, table, fallback):
+    """TOOL_MAP handler for a branching tool: table[a[field]] or fallback."""
+    def _call(a):
+        return table.get(a[field], fallback)(a)
+    return _call
+
+_volume = _selector("action", {
+    "get": _z(get_volume),
+    "set": lambda a: set_volume(int(a["level"])),
+}, lambda a: mute_volume(a["action"] == "mute"))
+
+_file_finder = _selector("type", {
+    "duplicates": lambda a: duplicate_finder(a.get("path","~")),
+}, lambda a: large_file_finder(a.get("path","~"), a.get("min_mb",100)))
+
+_clipboard = _selector("action", {
+    "get": _z(get_clipboard),
+    "set": lambda a: set_clipboard(a["text"]),
+}, _z(clipboard_history))
+
+_venv = _selector("action", {
+    "create": lambda a: create_venv(a["path"]),
+}, lambda a: list_venvs(a.get("search_path","~")))
+
+_docker = _selector("action", {
+    "ps":     lambda a: docker_ps(a.get("all_",False)),
+    "images": _z(docker_images),
+    "logs":   lambda a: docker_logs(a["container"], a.get("lines",50)),
+}, lambda a: docker_action(a["container"], a["action"]))
+
+_cron = _selector("action", {
+    "list": _z(list_cron),
+    "add":  lambda a: add_cron(a["schedule"], a["command"], a.get("name","")),
+}, lambda a: remove_cron(a["pattern"]))
+
+_pomodoro = _selector("action", {
+    "start":  lambda a: start_pomodoro(a.get("task","Focus"), a.get("minutes",25)),
+    "status": _z(pomodoro_status),
+}, _z(stop_pomodoro))
+
+_browser_nav = _selector("action", {
+    "back":    _z(go_back),
+    "forward": _z(go_forward),
+    "reload":  _z(reload),
+    "get_url": _z(get_url),
+}, _z(get_title))
+
+_page_data = _selector("type", {
+    "cookies":       lambda a: get_cookies(a.get("domain")),
+    "local_storage": lambda a: get_storage("local"),
+}, lambda a: get_storage("session"))
+
+_login_manager = _selector("action", {
+    "save": lambda a: save_login(a["site"], a["username"], a["password"], a.get("url_pattern","")),
+}, _z(list_logins))
+
+_form_memory = _selector("action", {
+    "save": lambda a: save_form(a["name"]),
+}, lambda a: fill_saved_form(a["name"]))
+
+_skills_cmd = _selector("action", {
+    "list":   _list_skills,
+    "reload": _reload_skills_cmd,
+}, _skill_status_cmd)
 
 
 # ══════════════════════════════════════════════════════════════════════════════
 # TOOL MAP
 # ══════════════════════════════════════════════════════════════════════════════
 
-def _make_map():
-    def wr(fn, *keys):
-        def _call(a): return fn(*[a[k] for k in keys])
-        return _call
-    def wro(fn, **defaults):
-        def _call(a):
-            kwargs = {k: a.get(k, v) for k, v in defaults.items()}
-            return fn(**kwargs)
-        return _call
+def _adapt(fn, req=(), opt=None):
+    """Generic handler: call fn(*required args, *optional args with defaults) from the tool args."""
+    opt = tuple((opt or {}).items())
+    def _call(a, fn=fn, req=req, opt=opt):
+        return fn(*[a[k] for k in req], *[a.get(k, d) for k, d in opt])
+    return _call
 
-    from ops.system_ops import R as OpR
 
+def _make_map():
     def _history(a):
-        from ops.system_ops import R
-        rows = get_history(a.get("limit",15), a.get("arm"))
-        if not rows: return R(True,"No history","db")
-        lines = [f"  {'✓' if r['success'] else '✗'} [{r['ts'][11:16]}] [{r['arm']}] {r['user_input'][:50]}" for r in rows]
+        lines = get_history_lines(a.get("limit",15), a.get("arm"))
+        if not lines: return R(True,"No history","db")
         return R(True,"\n".join(lines),"db")
 
     def _undo(a):
-        from ops.system_ops import _run, R
         u = get_undoable()
         if not u: return R(False,"Nothing to undo","")
         last = u[0]
@@ -741,146 +943,143 @@ def _make_map():
         if ok: mark_undone(last["id"])
         return R(ok, f"Undone: {last['user_input']}\n{out}" if ok else f"Undo failed: {out}", last["undo_cmd"])
 
-    def _run_alias(a):
-        from ops.system_ops import _run, R
-        alias = get_alias(a["name"])
-        if not alias: return R(False, f"Alias '{a['name']}' not found","db")
-        bump_alias(a["name"])
-        ok, out = _run(alias["command"])
-        return R(ok, out, alias["command"])
-
     def _ask_page(a):
-        from ops.system_ops import R
         result = ask_about_page(a["question"])
         if not result.ok: return result
-        if "PAGE_CONTENT_FOR_QA::" in result.out:
-            _, rest = result.out.split("PAGE_CONTENT_FOR_QA::", 1)
-            content, question = rest.split("::QUESTION::", 1)
-            return R(True, f"[PAGE Q&A — content extracted, agent will answer]\nQuestion: {question}\nContent: {content[:3000]}", "page_qa")
-        return result
+        # Locate both markers by index and slice once — no intermediate split copies
+        out = result.out
+        i = out.find("PAGE_CONTENT_FOR_QA::")
+        if i < 0: return result
+        i += len("PAGE_CONTENT_FOR_QA::")
+        j = out.find("::QUESTION::", i)
+        if j < 0: return result
+        question = out[j + len("::QUESTION::"):]
+        return R(True, f"[PAGE Q&A — content extracted, agent will answer]\nQuestion: {question}\nContent: {out[i:min(j, i + 3000)]}", "page_qa")
+
+    def _set_pref(a):
+        set_pref(a["key"], a["value"])
+        return R(True, f"Set {a['key']} = {a['value']}", "db")
 
     def _dstats(a):
-        from ops.system_ops import R
         s = db_stats()
-        lines = [f"  {k:<25} {v}" for k,v in s.items()]
-        return R(True, "Friday DB:\n" + "\n".join(lines), "db")
+        return R(True, "\n".join(["Friday DB:", *map("  {:<25} {}".format, s.keys(), s.values())]), "db")
 
     return {
         # Volume
-        "volume": lambda a: get_volume() if a["action"]=="get" else (set_volume(int(a["level"])) if a["action"]=="set" else mute_volume(a["action"]=="mute")),
+        "volume": _volume,
         # WiFi
-        "list_wifi_networks": lambda a: list_wifi_networks(),
-        "connect_wifi": lambda a: connect_wifi(a["ssid"], a.get("password")),
-        "disconnect_wifi": lambda a: disconnect_wifi(a.get("ssid")),
-        "save_wifi_creds": lambda a: save_wifi_creds(a["ssid"], a["password"], a.get("security","WPA2")),
-        "get_saved_wifi": lambda a: get_saved_wifi(),
-        "hotspot_create": lambda a: hotspot_create(a["ssid"], a["password"], a.get("band","bg")),
-        "change_dns": lambda a: change_dns(a["primary"], a.get("secondary","8.8.4.4")),
-        "speed_test": lambda a: speed_test(),
-        "network_scan": lambda a: network_scan(),
-        "net_info": lambda a: net_info(),
+        "list_wifi_networks": _z(list_wifi_networks),
+        "connect_wifi": _adapt(connect_wifi, ("ssid",), {"password": None}),
+        "disconnect_wifi": _adapt(disconnect_wifi, (), {"ssid": None}),
+        "save_wifi_creds": _adapt(save_wifi_creds, ("ssid", "password"), {"security": "WPA2"}),
+        "get_saved_wifi": _z(get_saved_wifi),
+        "hotspot_create": _adapt(hotspot_create, ("ssid", "password"), {"band": "bg"}),
+        "change_dns": _adapt(change_dns, ("primary",), {"secondary": "8.8.4.4"}),
+        "speed_test": _z(speed_test),
+        "network_scan": _z(network_scan),
+        "net_info": _z(net_info),
         # BT
         "bluetooth": _bluetooth_dispatch,
         # Files
-        "move_file": lambda a: move_file(a["source"], a["destination"]),
-        "copy_file": lambda a: copy_file(a["source"], a["destination"]),
-        "delete_file": lambda a: delete_file(a["path"]),
-        "create_dir": lambda a: create_dir(a["path"]),
-        "list_dir": lambda a: list_dir(a.get("path",".")),
-        "read_file": lambda a: read_file(a["path"]),
-        "write_file": lambda a: write_file(a["path"], a["content"], a.get("mode","write")),
-        "file_search": lambda a: file_search(a["query"], a.get("path","~"), a.get("dtype"), a.get("days")),
-        "bulk_rename": lambda a: bulk_rename(a["path"], a["pattern"], a["replacement"]),
-        "file_finder": lambda a: duplicate_finder(a.get("path","~")) if a["type"]=="duplicates" else large_file_finder(a.get("path","~"), a.get("min_mb",100)),
-        "archive_files": lambda a: archive_files(a["path"], a["output"], a.get("fmt","zip")),
-        "extract_archive": lambda a: extract_archive(a["path"], a.get("dest",".")),
+        "move_file": _adapt(move_file, ("source", "destination")),
+        "copy_file": _adapt(copy_file, ("source", "destination")),
+        "delete_file": _adapt(delete_file, ("path",)),
+        "create_dir": _adapt(create_dir, ("path",)),
+        "list_dir": _adapt(list_dir, (), {"path": "."}),
+        "read_file": _adapt(read_file, ("path",)),
+        "write_file": _adapt(write_file, ("path", "content"), {"mode": "write"}),
+        "file_search": _adapt(file_search, ("query",), {"path": "~", "dtype": None, "days": None}),
+        "bulk_rename": _adapt(bulk_rename, ("path", "pattern", "replacement")),
+        "file_finder": _file_finder,
+        "archive_files": _adapt(archive_files, ("path", "output"), {"fmt": "zip"}),
+        "extract_archive": _adapt(extract_archive, ("path",), {"dest": "."}),
         # Packages
-        "install_package": lambda a: install_package(a["package"], a.get("manager","auto")),
-        "uninstall_package": lambda a: uninstall_package(a["package"], a.get("manager","auto")),
+        "install_package": _adapt(install_package, ("package",), {"manager": "auto"}),
+        "uninstall_package": _adapt(uninstall_package, ("package",), {"manager": "auto"}),
         # System
-        "system_info": lambda a: system_info(),
-        "list_processes": lambda a: list_processes(a.get("filter_name")),
-        "kill_process": lambda a: kill_process(a.get("pid"), a.get("name")),
-        "disk_usage": lambda a: disk_usage(a.get("path","/")),
-        "get_ip": lambda a: get_ip(),
-        "get_location": lambda a: _get_location(),
-        "service_action": lambda a: service_action(a["name"], a["action"]),
-        "launch_app": lambda a: launch_app(a["app_name"]),
-        "set_brightness": lambda a: set_brightness(a["level"]),
-        "lock_screen": lambda a: lock_screen(),
+        "system_info": _z(system_info),
+        "list_processes": _adapt(list_processes, (), {"filter_name": None}),
+        "kill_process": _adapt(kill_process, (), {"pid": None, "name": None}),
+        "disk_usage": _adapt(disk_usage, (), {"path": "/"}),
+        "get_ip": _z(get_ip),
+        "get_location": _z(_get_location),
+        "service_action": _adapt(service_action, ("name", "action")),
+        "launch_app": _adapt(launch_app, ("app_name",)),
+        "set_brightness": _adapt(set_brightness, ("level",)),
+        "lock_screen": _z(lock_screen),
         # Clipboard
-        "clipboard": lambda a: get_clipboard() if a["action"]=="get" else (set_clipboard(a["text"]) if a["action"]=="set" else clipboard_history()),
+        "clipboard": _clipboard,
         # Venv/Docker/SSH
-        "venv": lambda a: create_venv(a["path"]) if a["action"]=="create" else list_venvs(a.get("search_path","~")),
-        "docker": lambda a: docker_ps(a.get("all_",False)) if a["action"]=="ps" else (docker_images() if a["action"]=="images" else (docker_logs(a["container"], a.get("lines",50)) if a["action"]=="logs" else docker_action(a["container"], a["action"]))),
-        "ssh_connect": lambda a: ssh_connect(a["host"], a.get("user"), a.get("port",22), a.get("key")),
-        "port_check": lambda a: port_check(a["port"]),
-        "kill_port": lambda a: kill_port(a["port"]),
+        "venv": _venv,
+        "docker": _docker,
+        "ssh_connect": _adapt(ssh_connect, ("host",), {"user": None, "port": 22, "key": None}),
+        "port_check": _adapt(port_check, ("port",)),
+        "kill_port": _adapt(kill_port, ("port",)),
         # Cron
-        "cron": lambda a: list_cron() if a["action"]=="list" else (add_cron(a["schedule"], a["command"], a.get("name","")) if a["action"]=="add" else remove_cron(a["pattern"])),
+        "cron": _cron,
         # Env
-        "env_read": lambda a: env_read(a.get("path",".env")),
-        "env_write": lambda a: env_write(a["path"], a["key"], a["value"]),
+        "env_read": _adapt(env_read, (), {"path": ".env"}),
+        "env_write": _adapt(env_write, ("path", "key", "value")),
         # Pomodoro
-        "pomodoro": lambda a: start_pomodoro(a.get("task","Focus"), a.get("minutes",25)) if a["action"]=="start" else (pomodoro_status() if a["action"]=="status" else stop_pomodoro()),
+        "pomodoro": _pomodoro,
         # Code
-        "run_python": lambda a: run_python(a["code"]),
-        "safe_shell": lambda a: safe_shell(a["cmd"]),
+        "run_python": _adapt(run_python, ("code",)),
+        "safe_shell": _adapt(safe_shell, ("cmd",)),
         # Web
-        "web_search": lambda a: web_search(a["query"]),
-        "fetch_page": lambda a: fetch_page(a["url"]),
-        "get_weather": lambda a: get_weather(a["location"]),
-        "get_datetime": lambda a: get_datetime(a.get("timezone")),
-        "calculate": lambda a: calculate(a["expression"]),
-        "get_stock": lambda a: get_stock(a["symbol"]),
-        "wikipedia": lambda a: wikipedia(a["topic"]),
-        "convert_currency": lambda a: convert_currency(a["amount"], a["from_cur"], a["to_cur"]),
-        "convert_units": lambda a: convert_units(a["value"], a["from_unit"], a["to_unit"]),
-        "generate_qr": lambda a: generate_qr(a["data"], a.get("output_path")),
-        "api_test": lambda a: api_test(a["url"], a.get("method","GET"), a.get("headers"), a.get("body")),
-        "start_local_server": lambda a: start_local_server(a.get("port",8080), a.get("directory",".")),
+        "web_search": _adapt(web_search, ("query",)),
+        "fetch_page": _adapt(fetch_page, ("url",)),
+        "get_weather": _adapt(get_weather, ("location",)),
+        "get_datetime": _adapt(get_datetime, (), {"timezone": None}),
+        "calculate": _adapt(calculate, ("expression",)),
+        "get_stock": _adapt(get_stock, ("symbol",)),
+        "wikipedia": _adapt(wikipedia, ("topic",)),
+        "convert_currency": _adapt(convert_currency, ("amount", "from_cur", "to_cur")),
+        "convert_units": _adapt(convert_units, ("value", "from_unit", "to_unit")),
+        "generate_qr": _adapt(generate_qr, ("data",), {"output_path": None}),
+        "api_test": _adapt(api_test, ("url",), {"method": "GET", "headers": None, "body": None}),
+        "start_local_server": _adapt(start_local_server, (), {"port": 8080, "directory": "."}),
         # Browser
-        "navigate": lambda a: navigate(a["url"]),
-        "browser_nav": lambda a: (go_back() if a["action"]=="back" else (go_forward() if a["action"]=="forward" else (reload() if a["action"]=="reload" else (get_url() if a["action"]=="get_url" else get_title())))),
-        "click": lambda a: click(a.get("selector"), a.get("text"), a.get("index",0)),
-        "fill_input": lambda a: fill_input(a["selector"], a["value"], a.get("clear_first",True)),
-        "fill_form": lambda a: fill_form(a["fields"]),
-        "select_option": lambda a: select_option(a["selector"], a.get("value"), a.get("text")),
-        "check_box": lambda a: check_box(a["selector"], a.get("checked",True)),
-        "scroll": lambda a: scroll(a.get("direction","down"), a.get("amount",500), a.get("selector")),
-        "hover": lambda a: hover(a["selector"]),
-        "press_key": lambda a: press_key(a["key"], a.get("selector")),
-        "wait_for": lambda a: wait_for(a["selector"], a.get("timeout_ms",5000)),
-        "read_page": lambda a: read_page(),
+        "navigate": _adapt(navigate, ("url",)),
+        "browser_nav": _browser_nav,
+        "click": _adapt(click, (), {"selector": None, "text": None, "index": 0}),
+        "fill_input": _adapt(fill_input, ("selector", "value"), {"clear_first": True}),
+        "fill_form": _adapt(fill_form, ("fields",)),
+        "select_option": _adapt(select_option, ("selector",), {"value": None, "text": None}),
+        "check_box": _adapt(check_box, ("selector",), {"checked": True}),
+        "scroll": _adapt(scroll, (), {"direction": "down", "amount": 500, "selector": None}),
+        "hover": _adapt(hover, ("selector",)),
+        "press_key": _adapt(press_key, ("key",), {"selector": None}),
+        "wait_for": _adapt(wait_for, ("selector",), {"timeout_ms": 5000}),
+        "read_page": _z(read_page),
         "page_extract": _page_extract_dispatch,
-        "find_element": lambda a: find_element(a["description"]),
+        "find_element": _adapt(find_element, ("description",)),
         "browser_tab": _browser_tab_dispatch,
-        "find_tab": lambda a: find_tab(a["query"]),
-        "page_data": lambda a: get_cookies(a.get("domain")) if a["type"]=="cookies" else get_storage("local" if a["type"]=="local_storage" else "session"),
-        "trigger_download": lambda a: trigger_download(a["url"]),
-        "dom_op": lambda a: dom_op(a["op"], a.get("value", "")),
-        "auto_login": lambda a: auto_login(a["site"]),
-        "login_manager": lambda a: save_login(a["site"],a["username"],a["password"],a.get("url_pattern","")) if a["action"]=="save" else list_logins(),
+        "find_tab": _adapt(find_tab, ("query",)),
+        "page_data": _page_data,
+        "trigger_download": _adapt(trigger_download, ("url",)),
+        "dom_op": _adapt(dom_op, ("op",), {"value": ""}),
+        "auto_login": _adapt(auto_login, ("site",)),
+        "login_manager": _login_manager,
         "browser_session": _browser_session_dispatch,
-        "form_memory": lambda a: save_form(a["name"]) if a["action"]=="save" else fill_saved_form(a["name"]),
+        "form_memory": _form_memory,
         "ask_about_page": _ask_page,
         # YouTube skills
         "youtube": _youtube_dispatch,
         # Memory
-        "remember_fact": lambda a: remember_fact(a["content"], a.get("category","general"), a.get("importance",1.0)),
-        "recall_facts": lambda a: recall_facts(a["query"]),
-        "show_facts": lambda a: show_facts(a.get("category")),
-        "save_note": lambda a: save_note(a["title"], a["content"], a.get("tags",[])),
-        "show_notes": lambda a: show_notes(),
-        "find_note": lambda a: find_note(a["query"]),
-        "add_reminder_nlp": lambda a: add_reminder_nlp(a["text"], a["when_str"], a.get("repeat","none"), a.get("priority","normal")),
-        "show_reminders": lambda a: show_reminders(),
-        "done_reminder": lambda a: done_reminder(a["rid"]),
-        "create_goal": lambda a: create_goal(a["title"], a.get("description","")),
-        "progress_goal": lambda a: progress_goal(a["gid"], a["progress"]),
-        "complete_goal": lambda a: complete_goal(a["gid"]),
-        "show_goals": lambda a: show_goals(a.get("status","active")),
-        "get_habits_summary": lambda a: (lambda h: __import__('ops.system_ops', fromlist=['R']).R(True, h, "db"))(get_habits_summary()),
+        "remember_fact": _adapt(remember_fact, ("content",), {"category": "general", "importance": 1.0}),
+        "recall_facts": _adapt(recall_facts, ("query",)),
+        "show_facts": _adapt(show_facts, (), {"category": None}),
+        "save_note": _adapt(save_note, ("title", "content"), {"tags": []}),
+        "show_notes": _z(show_notes),
+        "find_note": _adapt(find_note, ("query",)),
+        "add_reminder_nlp": _adapt(add_reminder_nlp, ("text", "when_str"), {"repeat": "none", "priority": "normal"}),
+        "show_reminders": _z(show_reminders),
+        "done_reminder": _adapt(done_reminder, ("rid",)),
+        "create_goal": _adapt(create_goal, ("title",), {"description": ""}),
+        "progress_goal": _adapt(progress_goal, ("gid", "progress")),
+        "complete_goal": _adapt(complete_goal, ("gid",)),
+        "show_goals": _adapt(show_goals, (), {"status": "active"}),
+        "get_habits_summary": lambda a: R(True, get_habits_summary(), "db"),
         # Aliases
         "alias": _alias_dispatch,
         # Snippets
@@ -891,17 +1090,73 @@ def _make_map():
         "watcher": _watcher_dispatch,
         # Skills
         "skill_help": _skill_help_dispatch,
-        "skills_cmd": lambda a: _list_skills(a) if a["action"]=="list" else (_reload_skills_cmd(a) if a["action"]=="reload" else _skill_status_cmd(a)),
+        "skills_cmd": _skills_cmd,
         "diagnose_skill_cmd":        _diagnose_skill_cmd,
         "validate_js_skill_cmd":     _validate_js_skill_cmd,
         # Meta
         "show_history": _history,
         "db_stats": _dstats,
         "undo_last": _undo,
-        "set_pref": lambda a: (set_pref(a["key"], a["value"]), __import__('ops.system_ops', fromlist=['R']).R(True, f"Set {a['key']} = {a['value']}", "db"))[1],
+        "set_pref": _set_pref,
     }
 
-TOOL_MAP = _make_map()
+# Interned names: the model's tool name is interned too, so lookups match on identity
+TOOL_MAP = {sys.intern(name): fn for name, fn in wrap_tools(_make_map()).items()}
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PARALLEL TOOL EXECUTION
+# ══════════════════════════════════════════════════════════════════════════════
+
+# Read-only / network-bound tools that may overlap within one LLM turn.
+# Anything that mutates state (files, packages, browser, vault) stays serial.
+PARALLEL_SAFE = frozenset({
+    "web_search", "fetch_page", "get_weather", "get_stock", "wikipedia", "get_datetime",
+    "calculate", "convert_currency", "convert_units", "read_file", "list_dir", "file_search", "system_info",
+    "disk_usage", "get_ip", "get_location", "net_info", "speed_test", "port_check",
+    "recall_facts", "show_facts", "show_notes", "find_note", "show_reminders", "show_goals",
+})
+
+# Tools whose repeated same-turn calls are intentional or time-dependent —
+# every call runs even when the args are identical.
+NO_DEDUP = frozenset({
+    "get_datetime", "speed_test",
+    "click", "press_key", "scroll", "browser_nav", "youtube",
+})
+
+TOOL_CONCURRENCY_LIMIT = int(os.getenv("TOOL_CONCURRENCY_LIMIT", "1"))
+# Streamed completions start read-only calls while the rest of the turn is still arriving
+LLM_STREAM = os.getenv("LLM_STREAM", "0") == "1"
+_tool_pool = (ThreadPoolExecutor(max_workers=max(TOOL_CONCURRENCY_LIMIT, 1), thread_name_prefix="friday-tool")
+              if TOOL_CONCURRENCY_LIMIT > 1 or LLM_STREAM else None)
+
+
+def _call_key(name, args):
+    """Same-turn dedup key for a tool call — None when every call must run.
+    Only read-only (PARALLEL_SAFE) calls are ever collapsed; a repeated mutation always runs."""
+    return (name, _dumps_sorted(args)) if name in PARALLEL_SAFE and name not in NO_DEDUP else None
+
+
+# Tools logged / echoed under the browser arm — the raw browser_tools names plus
+# every schema in the browser scope (grouped tools like youtube, browser_tab).
+_BROWSER_TOOLS = frozenset({
+    "navigate","browser_nav",
+    "click","fill_input","fill_form","select_option","check_box","scroll",
+    "hover","press_key","wait_for","get_text","get_html","read_page",
+    "extract_table","find_element","get_links","get_form_fields",
+    "get_tabs","open_tab","close_tab","focus_tab","close_other_tabs",
+    "find_tab","close_tabs_by_domain","get_cookies","get_storage",
+    "trigger_download","dom_op","auto_login","save_login","list_logins",
+    "start_recording","stop_recording","replay_session","list_sessions_info",
+    "save_form","fill_saved_form","ask_about_page",
+}) | _BROWSER_SCHEMAS
+
+_ARM_ICON = {"browser": "🌐", "cmd": "⚙"}
+
+
+def _short_repr(v, n=30):
+    """repr(v)[:n] without repr-ing a whole large string first (write_file content, scripts)."""
+    return repr(v[:n] if isinstance(v, str) else v)[:n]
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -909,13 +1164,23 @@ TOOL_MAP = _make_map()
 # ══════════════════════════════════════════════════════════════════════════════
 
 class FridayAgent:
+    # Fixed attribute set — no per-instance __dict__, slot reads on the chat hot path
+    __slots__ = ("client", "model", "confirm", "out", "history", "_sys_msg", "_gen", "ctx",
+                 "_base_tools", "_base_handlers", "_skill_tools", "_skill_handlers", "_hot",
+                 "_tools", "_scoped", "_tool_map")
+
     def __init__(self, confirm_callback, output_callback,
                  extra_tools=None, extra_handlers=None):
+        from groq import Groq
         self.client   = Groq(api_key=os.getenv("GROQ_API_KEY",""))
         self.model    = os.getenv("MODEL","meta-llama/llama-4-scout-17b-16e-instruct")
         self.confirm  = confirm_callback
         self.out      = output_callback
-        self.history  = []
+        self.history  = deque(maxlen=14)   # only the last 14 messages are ever sent
+        self._sys_msg = {"role": "system", "content": None}
+        # Sampling settings are fixed for the session — parse the env once, not per request
+        self._gen     = {"max_tokens":  int(os.getenv("MAX_TOKENS",4096)),
+                         "temperature": float(os.getenv("TEMPERATURE",0.1))}
         # Session context tracker — powers natural follow-up commands
         from core.context import SessionContext
         self.ctx = SessionContext()
@@ -924,20 +1189,18 @@ class FridayAgent:
         self._base_handlers = TOOL_MAP
         self._skill_tools   = extra_tools or []
         self._skill_handlers = extra_handlers or {}
+        self._hot           = set()
         self._rebuild_tools()
 
     def _rebuild_tools(self):
         """Rebuild tool list after skill reload."""
-        combined = self._base_tools + self._skill_tools
-
-        # Deduplicate by tool name (keep first occurrence)
-        seen = set()
-        deduped = []
-        for t in combined:
-            name = t.get("function", {}).get("name", "")
-            if name and name not in seen:
-                seen.add(name)
-                deduped.append(t)
+        # Deduplicate by tool name (keep first occurrence) — base TOOLS are unique already.
+        # fromkeys fixes first-seen order; the reversed comprehension lets the first def win.
+        skills = self._skill_tools
+        names  = [t.get("function", {}).get("name", "") for t in skills]
+        first  = {n: t for n, t in zip(reversed(names), reversed(skills))}
+        deduped = [*self._base_tools,
+                   *[first[n] for n in dict.fromkeys(names) if n and n not in _BASE_TOOL_NAMES]]
 
         # Groq (and most LLM APIs) cap tools at 128
         MAX_TOOLS = int(os.getenv("MAX_TOOLS", 128))
@@ -950,8 +1213,10 @@ class FridayAgent:
             )
             deduped = deduped[:MAX_TOOLS]
 
-        self._tools    = deduped
-        self._tool_map = {**self._base_handlers, **self._skill_handlers}
+        self._tools  = deduped
+        self._scoped = {}
+        self._tool_map = {**self._base_handlers,
+                          **{sys.intern(k): v for k, v in self._skill_handlers.items()}}
 
     def reload_skills(self):
         """Reload skills and rebuild tool list."""
@@ -962,14 +1227,31 @@ class FridayAgent:
         self._rebuild_tools()
         return len(skill_tools)
 
-    def _llm(self, messages):
+    def _turn_tools(self):
+        """Schemas to offer this turn — everything, or the active arm under TOOL_SCOPE=arm."""
+        la = self.ctx.last_action
+        if TOOL_SCOPE != "arm" or la is None:
+            return self._tools
+        arm = TOOL_ARM.get(la.tool, "cmd")
+        if arm not in ("cmd", "browser"):
+            return self._tools
+        key = (arm, len(self._hot))
+        tools = self._scoped.get(key)
+        if tools is None:
+            keep = {arm, "web", "core", "skill"}   # skill tools are never filtered
+            tools = self._scoped[key] = [
+                t for t in self._tools
+                if (n := t["function"]["name"]) in self._hot or TOOL_ARM.get(n, "skill") in keep
+            ]
+        return tools
+
+    def _llm(self, messages, tools=None):
         import groq as _groq
         try:
             return self.client.chat.completions.create(
                 model=self.model, messages=messages,
-                tools=self._tools, tool_choice="auto",
-                max_tokens=int(os.getenv("MAX_TOKENS",4096)),
-                temperature=float(os.getenv("TEMPERATURE",0.1)),
+                tools=tools or self._tools, tool_choice="auto", stream=LLM_STREAM,
+                **self._gen,
             )
         except _groq.BadRequestError as e:
             err = str(e)
@@ -981,19 +1263,18 @@ class FridayAgent:
                 )
                 return self.client.chat.completions.create(
                     model=self.model, messages=messages,
-                    max_tokens=int(os.getenv("MAX_TOKENS",4096)),
-                    temperature=float(os.getenv("TEMPERATURE",0.1)),
+                    **self._gen,
                 )
             raise
 
     def _dispatch(self, name, args, user_input):
-        t0 = time.time()
+        t0 = time.perf_counter_ns()   # monotonic — immune to wall-clock jumps
         risk = classify_tool(name, args)
 
         if risk.level == Risk.DANGEROUS:
             msg = risk.warn_msg or f"{name}({args})"
             if not self.confirm(msg, risk.level):
-                log_cmd(user_input, name, str(args), risk.level, False, "Cancelled", None, 0, self._arm(name))
+                log_cmd_async(user_input, name, str(args), risk.level.name, False, "Cancelled", None, 0, self._arm(name))
                 return "⛔ Cancelled."
 
         # Augment args with learned preferences
@@ -1004,39 +1285,116 @@ class FridayAgent:
             return f"[Unknown tool: {name}]"
 
         result = fn(args)
-        ms = (time.time() - t0) * 1000
+        ms = (time.perf_counter_ns() - t0) / 1_000_000
 
         # Learn from the choice
         record_tool_choice(name, args)
+        self._hot.add(name)   # used once → stays offered under TOOL_SCOPE=arm
 
-        out = getattr(result, "out", str(result))
-        ok  = getattr(result, "ok",  True)
+        out = getattr(result, "out", None)
+        if out is None:   # skill handlers may return a bare string
+            out, ok, undo, cmd = str(result), True, None, ""
+        else:
+            ok, undo, cmd = getattr(result, "ok", True), getattr(result, "undo", None), getattr(result, "cmd", "")
 
         # ── Update session context ─────────────────────────────────────────
         self.ctx.update(name, args, out, ok)
 
         # Log
-        undo = getattr(result, "undo", None)
-        log_cmd(user_input, name, getattr(result,"cmd",""), risk.level, ok,
-                out, undo, ms, self._arm(name))
+        log_cmd_async(user_input, name, cmd, risk.level.name, ok, out, undo, ms, self._arm(name))
 
         if risk.level == Risk.RECOVERABLE and undo and ok:
             return out + "\n  ↩ undoable"
         return out
 
-    def _arm(self, tool_name):
-        browser_tools = {
-            "navigate","browser_nav",
-            "click","fill_input","fill_form","select_option","check_box","scroll",
-            "hover","press_key","wait_for","get_text","get_html","read_page",
-            "extract_table","find_element","get_links","get_form_fields",
-            "get_tabs","open_tab","close_tab","focus_tab","close_other_tabs",
-            "find_tab","close_tabs_by_domain","get_cookies","get_storage",
-            "trigger_download","dom_op","auto_login","save_login","list_logins",
-            "start_recording","stop_recording","replay_session","list_sessions_info",
-            "save_form","fill_saved_form","ask_about_page",
-        }
-        return "browser" if tool_name in browser_tools else "cmd"
+    def _run_calls(self, calls, user_input, early=None):
+        """Dispatch one turn's tool calls, running identical reads only once between mutations."""
+        unique, keys, slots, index = [], [], [], {}
+        for name, args in calls:
+            if name not in PARALLEL_SAFE:
+                index.clear()   # no read result is reused across a state change
+            key = _call_key(name, args)
+            if key not in index:
+                if key is not None: index[key] = len(unique)
+                slots.append(len(unique))
+                unique.append((name, args))
+                keys.append(key)
+            else:
+                slots.append(index[key])
+        results = self._run_batch(unique, keys, user_input, early or {})
+        return [results[i] for i in slots]
+
+    def _run_batch(self, calls, keys, user_input, early):
+        """Dispatch distinct tool calls in order; adjacent parallel-safe calls overlap when enabled."""
+        parallel = [i for i, (name, _) in enumerate(calls) if name in PARALLEL_SAFE]
+        if not early and (_tool_pool is None or len(parallel) < 2):
+            return [self._dispatch(name, args, user_input) for name, args in calls]
+
+        results, run = [None] * len(calls), []
+
+        def flush():
+            # Calls already started while the completion was streaming are joined, not re-run
+            futures = {i: early.get(keys[i]) or _tool_pool.submit(self._dispatch, *calls[i], user_input)
+                       for i in run}
+            wait(futures.values())
+            for i, f in futures.items():
+                results[i] = f.result()
+            run.clear()
+
+        for i, (name, args) in enumerate(calls):
+            if name in PARALLEL_SAFE and _tool_pool is not None:
+                run.append(i)
+                continue
+            # A state-mutating call waits for everything before it and runs alone
+            if run: flush()
+            early = {}   # streamed starts only ever precede the first mutation
+            results[i] = self._dispatch(name, args, user_input)
+        if run: flush()
+        return results
+
+    def _drain_stream(self, stream, user_input):
+        """Collect a streamed completion into a choice-like object.
+
+        Parallel-safe tool calls are submitted to the pool as soon as their
+        arguments parse, so they run while later calls are still streaming —
+        but only while every earlier call is parallel-safe and already started,
+        so nothing overtakes a state-mutating call.
+        Returns (choice, early) where early maps _call_key → Future.
+        """
+        content, slots, early, finish = [], {}, {}, None
+        started = 0   # slots 0..started-1 are all parallel-safe and submitted
+        for chunk in stream:
+            if not chunk.choices: continue
+            c = chunk.choices[0]
+            finish = c.finish_reason or finish
+            d = c.delta
+            if d.content: content.append(d.content)
+            for part in d.tool_calls or ():
+                s = slots.setdefault(part.index, {"id": "", "name": "", "args": ""})
+                if part.id: s["id"] = part.id
+                if part.function is not None:
+                    s["name"] += part.function.name or ""
+                    s["args"] += part.function.arguments or ""
+            while started in slots:
+                s = slots[started]
+                name = s["name"]
+                if name not in PARALLEL_SAFE or name in NO_DEDUP or not s["args"].endswith("}"):
+                    break
+                try: args = _loads(s["args"])
+                except ValueError: break
+                started += 1
+                key = _call_key(sys.intern(name), args)
+                if key not in early:
+                    early[key] = _tool_pool.submit(self._dispatch, sys.intern(name), args, user_input)
+
+        tool_calls = [SimpleNamespace(id=s["id"], function=SimpleNamespace(name=s["name"], arguments=s["args"]))
+                      for _, s in sorted(slots.items())]
+        message = SimpleNamespace(content="".join(content) or None, tool_calls=tool_calls or None)
+        return SimpleNamespace(finish_reason=finish, message=message), early
+
+    @staticmethod
+    def _arm(tool_name):
+        return "browser" if tool_name in _BROWSER_TOOLS else "cmd"
 
     def chat(self, user_input: str) -> str:
         raw_input = user_input.strip()
@@ -1047,7 +1405,7 @@ class FridayAgent:
         if shorthand:
             tool = shorthand["tool"]
             args = shorthand["args"]
-            arm_icon = "🌐" if self._arm(tool) == "browser" else "⚙"
+            arm_icon = _ARM_ICON[self._arm(tool)]
             self.out(f"  {arm_icon}  {tool}({args})", "tool")
             result = self._dispatch(tool, args, raw_input)
             reply = result or "Done."
@@ -1057,12 +1415,21 @@ class FridayAgent:
 
         # ── Full LLM path with session context injected ────────────────────
         self.history.append({"role": "user", "content": raw_input})
-        messages = [{"role": "system", "content": _build_system_prompt(self.ctx)}]
-        messages.extend(self.history[-14:])
-
+        # _build_system_prompt returns the same cached str while nothing relevant changed,
+        # so the system message is only rebuilt when the prompt text actually differs
+        prompt = _build_system_prompt(self.ctx)
+        if prompt is not self._sys_msg["content"]:
+            self._sys_msg = {"role": "system", "content": prompt}
+        messages = [self._sys_msg]
+        messages.extend(self.history)
+
+        tools = self._turn_tools()
         for _ in range(10):  # max iterations
-            resp = self._llm(messages)
-            choice = resp.choices[0]
+            resp = self._llm(messages, tools)
+            if hasattr(resp, "choices"):   # plain completion (or the no-tools retry)
+                choice, early = resp.choices[0], None
+            else:
+                choice, early = self._drain_stream(resp, raw_input)
 
             if choice.finish_reason == "tool_calls" and choice.message.tool_calls:
                 tc_list = choice.message.tool_calls
@@ -1072,14 +1439,15 @@ class FridayAgent:
                                    "function":{"name":tc.function.name,"arguments":tc.function.arguments}}
                                   for tc in tc_list]
                 })
+                calls = []
                 for tc in tc_list:
-                    name = tc.function.name
-                    try: args = json.loads(tc.function.arguments)
+                    name = sys.intern(tc.function.name)
+                    try: args = _loads(tc.function.arguments)
                     except Exception: args = {}
-                    arm = self._arm(name)
-                    arm_icon = "🌐" if arm == "browser" else "⚙"
-                    self.out(f"  {arm_icon}  {name}({', '.join(f'{k}={repr(v)[:30]}' for k,v in args.items())})", "tool")
-                    result_text = self._dispatch(name, args, raw_input)
+                    arm_icon = _ARM_ICON[self._arm(name)]
+                    self.out(f"  {arm_icon}  {name}({', '.join(f'{k}={_short_repr(v)}' for k,v in args.items())})", "tool")
+                    calls.append((name, args))
+                for tc, result_text in zip(tc_list, self._run_calls(calls, raw_input, early)):
                     messages.append({"role":"tool","tool_call_id":tc.id,"content":result_text})
                 continue
 
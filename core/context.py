@@ -18,24 +18,42 @@ Examples:
   Friday: [reads page, answers]    ← remembers we're on youtube
 """
 
+import re
+import time
+from collections import deque
+from enum import IntEnum
 from dataclasses import dataclass, field
 from typing import Optional, Any
-from datetime import datetime
 
+_NUM_RE    = re.compile(r'\b(\d{1,3})\b')   # volume / brightness level
+_ANYNUM_RE = re.compile(r'\b(\d+)\b')       # seek seconds
 
-@dataclass
+
+class Subject(IntEnum):
+    """What a tool acts on — compared by identity on the shorthand hot path."""
+    NONE = 0; VOLUME = 1; VIDEO = 2; POSITION = 3; SPEED = 4; DISPLAY = 5; PAGE = 6; ELEMENT = 7
+    INPUT = 8; FILE = 9; WIFI = 10; BLUETOOTH = 11; PACKAGE = 12; BRIGHTNESS = 13; CONTAINER = 14; SEARCH = 15
+
+    def __str__(self):
+        return self.name.lower() if self else ""
+
+    def __format__(self, spec):
+        return format(str(self), spec)
+
+
+@dataclass(slots=True)
 class ActionContext:
     """Represents the last action Friday took."""
     tool:        str            # tool name e.g. "youtube_volume"
     args:        dict           # args used e.g. {"level": 50}
     result:      str            # what happened e.g. "Volume set to 50%"
     ok:          bool           # success?
-    timestamp:   datetime = field(default_factory=datetime.now)
+    timestamp:   float    = field(default_factory=time.monotonic)   # monotonic seconds
 
     # Inferred context
     site:        str  = ""      # e.g. "youtube", "netflix", "gmail"
     arm:         str  = "cmd"   # "cmd" or "browser"
-    subject:     str  = ""      # what was acted on e.g. "volume", "video", "tab"
+    subject:     Subject = Subject.NONE   # what was acted on e.g. VOLUME, VIDEO, PAGE
 
 
 # ── Tool → semantic context mapping ──────────────────────────────────────────
@@ -95,6 +113,39 @@ TOOL_CONTEXT = {
     "web_search":           {"site": "web",      "subject": "search",   "arm": "cmd"},
 }
 
+# ── Per-tool session state updates (called by update()) ──────────────────────
+
+def _upd_volume(ctx, args):
+    if "level" in args: ctx.last_volume = args["level"]
+
+def _upd_yt_volume(ctx, args):
+    if "level" in args: ctx.last_yt_vol = args["level"]
+
+def _upd_brightness(ctx, args):
+    if "level" in args: ctx.last_brightness = args["level"]
+
+def _upd_navigate(ctx, args):
+    if "url" in args:
+        frags = [m.group(1) for m in _URL_SITE_RE.finditer(args["url"].lower())]
+        ctx.current_site = _URL_SITES[min(frags, key=_URL_RANK.__getitem__)] if frags else ""
+        ctx.current_url = args["url"]
+
+_STATE_UPDATES = {
+    "volume":         _upd_volume,
+    "youtube_volume": _upd_yt_volume,
+    "set_brightness": _upd_brightness,
+    "navigate":       _upd_navigate,
+}
+
+# Flattened (site, arm, subject, state update, inferred site) per tool — read by
+# update() on every tool call. The inferred site is "" for generic sites.
+_TOOL_CONTEXT_FAST = {
+    k: (v.get("site", ""), v.get("arm", "cmd"), Subject[v.get("subject", "none").upper()], _STATE_UPDATES.get(k),
+        "" if v.get("site", "") in ("system", "web", "docker") else v.get("site", ""))
+    for k, v in TOOL_CONTEXT.items()
+}
+_NO_CONTEXT = ("", "cmd", Subject.NONE, None, "")
+
 # ── Natural language → relative adjustment patterns ─────────────────────────
 
 VOLUME_ADJUSTMENTS = {
@@ -198,6 +249,109 @@ SPEED_PATTERNS = {
 }
 
 
+# ── Phrase matchers — built once at import ────────────────────────────────────
+# Within each table, phrases rank longest-first (stable, so ties keep dict order) —
+# the same order the resolver used to sort into on every call.
+
+_PHRASE_TABLES = {
+    "volume":     VOLUME_ADJUSTMENTS,
+    "brightness": BRIGHTNESS_ADJUSTMENTS,
+    "skip":       SKIP_PATTERNS,
+    "speed":      SPEED_PATTERNS,
+}
+_PHRASE_RANKED = {cat: sorted(table, key=len, reverse=True) for cat, table in _PHRASE_TABLES.items()}
+
+# A zero-width lookahead over every phrase of every table reports, per position,
+# the longest phrase starting there. Any phrase of a table contained in that hit
+# is present too, so each hit maps to the best (lowest) rank per table it implies.
+_ALL_PHRASES = sorted({p for table in _PHRASE_TABLES.values() for p in table}, key=len, reverse=True)
+_PHRASE_RE   = re.compile("(?=(" + "|".join(map(re.escape, _ALL_PHRASES)) + "))")
+def _implied_ranks(hit):
+    ranks = {}
+    for cat, ranked in _PHRASE_RANKED.items():
+        for i, p in enumerate(ranked):
+            if p in hit:
+                ranks[cat] = i
+                break
+    return ranks
+
+_PHRASE_HITS = {hit: _implied_ranks(hit) for hit in _ALL_PHRASES}
+
+def _find_phrases(text):
+    """One scan of text → {table: (phrase, value)} for the best phrase of each table present."""
+    best = {}
+    for m in _PHRASE_RE.finditer(text):
+        for cat, r in _PHRASE_HITS[m.group(1)].items():
+            if r < best.get(cat, r + 1):
+                best[cat] = r
+    found = {}
+    for cat, r in best.items():
+        phrase = _PHRASE_RANKED[cat][r]
+        found[cat] = (phrase, _PHRASE_TABLES[cat][phrase])
+    return found
+
+# Playback phrases grouped by intent for str.startswith(tuple). "toggle" is tried
+# first because "play pause" / "play/pause" extend the plain "play" prefix.
+_PLAYBACK_PREFIXES = tuple(
+    (intent, tuple(p for p, i in PLAYBACK_INTENTS.items() if i == intent))
+    for intent in ("toggle", "play", "pause")
+)
+
+# (intent, site) → native playback tool; other sites fall back to toggle_<site>
+_PLAY_TOOL = {
+    (intent, site): f"{intent}_{site}" if site in ("youtube", "netflix") else f"toggle_{site}"
+    for intent in ("play", "pause", "toggle") for site in ("youtube", "netflix", "spotify")
+}
+
+def _playback_intent(text):
+    """Intent of the longest playback phrase text starts with, else None."""
+    for intent, prefixes in _PLAYBACK_PREFIXES:
+        if text.startswith(prefixes):
+            return intent
+    return None
+
+# Cue words — whole words only, so "unmute" is not a mute and "screenshot" is not the screen
+_VOL_CUE_RE    = re.compile(r"\b(?:volume|vol|sound|audio)\b")
+_MUTE_RE       = re.compile(r"\b(?:mute|silence|silent)\b")
+_UNMUTE_RE     = re.compile(r"\b(?:unmute|unsilence)\b")
+_BRIGHT_CUE_RE = re.compile(r"\b(?:brightness|screen)\b")
+_FILE_OPEN_RE  = re.compile(r"\b(?:open|read|show)\b")
+_FILE_DEL_RE   = re.compile(r"\b(?:delete|remove)\b")
+
+# Everything besides a phrase-table hit that can make resolve_shorthand return:
+# a number, a mute/file cue word, or a leading playback phrase
+_SHORTHAND_CUE_RE = re.compile(r"\d|\b(?:mute|silence|silent|unmute|unsilence|open|read|show|delete|remove)\b")
+_PLAYBACK_ALL     = tuple(PLAYBACK_INTENTS)
+
+# Words that mean a bare number is a seek/speed value, not a volume level
+_NON_VOLUME_WORDS = frozenset({"skip","forward","back","rewind","seek","speed","x","faster","slower","second","sec"})
+
+# URL fragment → site, in priority order (first listed wins when a URL names several)
+_URL_SITES = {
+    "youtube": "youtube",
+    "netflix": "netflix",
+    "gmail":   "gmail",
+    "twitter": "twitter",
+    "x.com":   "twitter",
+    "spotify": "spotify",
+}
+_URL_RANK    = {frag: i for i, frag in enumerate(_URL_SITES)}
+_URL_SITE_RE = re.compile("(?=(" + "|".join(map(re.escape, _URL_SITES)) + "))")
+
+# Playback intent → JS fallback op
+# Prebuilt results for the parameterless shorthands — shared, so never mutate them
+_R_DOM_MUTE   = {"tool": "dom_op", "args": {"op": "video_mute"}}
+_R_DOM_UNMUTE = {"tool": "dom_op", "args": {"op": "video_unmute"}}
+_R_VOL_MUTE   = {"tool": "volume", "args": {"action": "mute"}}
+_R_VOL_UNMUTE = {"tool": "volume", "args": {"action": "unmute"}}
+
+_PLAYBACK_OPS = {
+    "play":   {"tool": "dom_op", "args": {"op": "video_play"}},
+    "pause":  {"tool": "dom_op", "args": {"op": "video_pause"}},
+    "toggle": {"tool": "dom_op", "args": {"op": "video_toggle"}},
+}
+
+
 class SessionContext:
     """Tracks active session state for natural follow-up commands."""
 
@@ -212,45 +366,34 @@ class SessionContext:
         self.last_file:     str   = ""
         self.last_package:  str   = ""
         self.last_search:   str   = ""
-        self.conversation:  list  = []     # recent exchanges (user, friday)
+        self.conversation:  deque = deque(maxlen=50)   # recent exchanges (user, friday) — bounded
+        self._version = 0                 # bumped by update(); keys the prompt memo
+        self._prompt_memo = (None, "")    # (signature, as_prompt_context() text)
 
     def update(self, tool: str, args: dict, result: str, ok: bool):
         """Called after every tool execution."""
-        ctx = TOOL_CONTEXT.get(tool, {})
-
-        self.last_action = ActionContext(
-            tool=tool, args=args, result=result, ok=ok,
-            site=ctx.get("site", ""),
-            arm=ctx.get("arm", "cmd"),
-            subject=ctx.get("subject", ""),
-        )
-
-        # Update specific state
-        if tool in ("volume",) and "level" in args:
-            self.last_volume = args["level"]
-        if tool in ("youtube_volume",) and "level" in args:
-            self.last_yt_vol = args["level"]
-        if tool == "set_brightness" and "level" in args:
-            self.last_brightness = args["level"]
-        if "path" in args:
-            self.last_file = args.get("path", "")
-        if "package" in args:
-            self.last_package = args.get("package", "")
-        if "query" in args:
-            self.last_search = args.get("query", "")
-        if tool == "navigate" and "url" in args:
-            url = args["url"].lower()
-            if "youtube" in url:   self.current_site = "youtube"
-            elif "netflix" in url: self.current_site = "netflix"
-            elif "gmail" in url:   self.current_site = "gmail"
-            elif "twitter" in url or "x.com" in url: self.current_site = "twitter"
-            elif "spotify" in url: self.current_site = "spotify"
-            else: self.current_site = ""
-            self.current_url = args["url"]
+        site, arm, subject, upd, inferred = _TOOL_CONTEXT_FAST.get(tool, _NO_CONTEXT)
+
+        # A fresh record swapped in with one assignment — update() runs on tool-pool
+        # threads, and holders of an older last_action must never see it change
+        self.last_action = ActionContext(tool, args, result, ok, time.monotonic(), site, arm, subject)
+
+        # Update specific state — tool-specific first, then args any tool may carry
+        if upd:
+            upd(self, args)
+        if args:
+            if "path" in args:
+                self.last_file = args["path"]
+            if "package" in args:
+                self.last_package = args["package"]
+            if "query" in args:
+                self.last_search = args["query"]
 
         # Infer site from tool
-        if ctx.get("site") and ctx["site"] not in ("system", "web", "docker"):
-            self.current_site = ctx["site"]
+        if inferred:
+            self.current_site = inferred
+
+        self._version += 1
 
     def resolve_shorthand(self, user_input: str) -> Optional[dict]:
         """
@@ -263,29 +406,27 @@ class SessionContext:
             return None
 
         subject  = self.last_action.subject
+        phrases  = _find_phrases(text)   # one scan serves every phrase table below
+        # Not a shorthand at all — skip every branch below
+        if not (phrases or _SHORTHAND_CUE_RE.search(text) or text.startswith(_PLAYBACK_ALL)):
+            return None
         site     = self.current_site or self.last_action.site
         last_vol = self.last_yt_vol if site == "youtube" else self.last_volume
 
         # ── Volume context ───────────────────────────────────────────────────
-        if subject == "volume" or any(w in text for w in ["volume", "vol", "sound", "audio"]):
+        if subject is Subject.VOLUME or _VOL_CUE_RE.search(text):
 
             # Check mute
-            if any(w in text for w in ["mute", "silence", "silent"]):
-                if site == "youtube":
-                    return {"tool": "dom_op", "args": {"op": "video_mute"}}
-                return {"tool": "volume", "args": {"action": "mute"}}
+            if _MUTE_RE.search(text):
+                return _R_DOM_MUTE if site == "youtube" else _R_VOL_MUTE
 
             # Check unmute
-            if any(w in text for w in ["unmute", "unsilence"]):
-                if site == "youtube":
-                    return {"tool": "dom_op", "args": {"op": "video_unmute"}}
-                return {"tool": "volume", "args": {"action": "unmute"}}
+            if _UNMUTE_RE.search(text):
+                return _R_DOM_UNMUTE if site == "youtube" else _R_VOL_UNMUTE
 
             # Exact number — but ONLY if text is clearly about volume, not speed/skip/seek
-            _non_volume_words = {"skip","forward","back","rewind","seek","speed","x","faster","slower","second","sec"}
-            _is_vol_context = not any(w in text.split() for w in _non_volume_words) and "x" not in text
-            import re
-            num_match = re.search(r'\b(\d{1,3})\b', text)
+            _is_vol_context = "x" not in text and _NON_VOLUME_WORDS.isdisjoint(text.split())
+            num_match = _NUM_RE.search(text)
             if num_match and _is_vol_context:
                 level = int(num_match.group(1))
                 level = max(0, min(100, level))
@@ -293,105 +434,106 @@ class SessionContext:
                     return {"tool": "youtube_volume", "args": {"level": level}}
                 return {"tool": "volume", "args": {"action": "set", "level": level}}
 
-            # Relative: louder / quieter etc. — sorted longest-first to avoid "louder" eating "a bit louder"
-            for phrase, delta in sorted(VOLUME_ADJUSTMENTS.items(), key=lambda x: -len(x[0])):
-                if phrase in text:
-                    if delta == 0:
-                        if site == "youtube":
-                            return {"tool": "dom_op", "args": {"op": "video_mute"}}
-                        return {"tool": "volume", "args": {"action": "mute"}}
-                    if delta == 100:
-                        if site == "youtube":
-                            return {"tool": "youtube_volume", "args": {"level": 100}}
-                        return {"tool": "volume", "args": {"action": "set", "level": 100}}
-                    if delta == 50:
-                        if site == "youtube":
-                            return {"tool": "youtube_volume", "args": {"level": 50}}
-                        return {"tool": "volume", "args": {"action": "set", "level": 50}}
-
-                    new_level = max(0, min(100, last_vol + delta))
+            # Relative: louder / quieter etc. — longest phrase wins so "louder" can't eat "a bit louder"
+            hit = phrases.get("volume")
+            if hit:
+                phrase, delta = hit
+                if delta == 0:
+                    return _R_DOM_MUTE if site == "youtube" else _R_VOL_MUTE
+                if delta == 100:
                     if site == "youtube":
-                        return {"tool": "youtube_volume", "args": {"level": new_level}}
-                    return {"tool": "volume", "args": {"action": "set", "level": new_level}}
+                        return {"tool": "youtube_volume", "args": {"level": 100}}
+                    return {"tool": "volume", "args": {"action": "set", "level": 100}}
+                if delta == 50:
+                    if site == "youtube":
+                        return {"tool": "youtube_volume", "args": {"level": 50}}
+                    return {"tool": "volume", "args": {"action": "set", "level": 50}}
+
+                new_level = max(0, min(100, last_vol + delta))
+                if site == "youtube":
+                    return {"tool": "youtube_volume", "args": {"level": new_level}}
+                return {"tool": "volume", "args": {"action": "set", "level": new_level}}
 
         # ── Video/playback context (youtube, netflix) ─────────────────────────
-        if subject in ("video",) or site in ("youtube", "netflix", "spotify"):
-
-            for phrase, intent in sorted(PLAYBACK_INTENTS.items(), key=lambda x: -len(x[0])):
-                if phrase == text or text.startswith(phrase):
-                    tool = f"{intent}_{site}" if site in ("youtube", "netflix") else f"toggle_{site}"
-                    if self._tool_map_has(tool):
-                        return {"tool": tool, "args": {}}
-                    # Fallback to JS
-                    op_map = {
-                        "play":   "video_play",
-                        "pause":  "video_pause",
-                        "toggle": "video_toggle",
-                    }
-                    op = op_map.get(intent)
-                    if op:
-                        return {"tool": "dom_op", "args": {"op": op}}
+        if subject is Subject.VIDEO or site in ("youtube", "netflix", "spotify"):
+
+            intent = _playback_intent(text)
+            if intent:
+                tool = _PLAY_TOOL.get((intent, site)) or f"toggle_{site}"
+                if self._tool_map_has(tool):
+                    return {"tool": tool, "args": {}}
+                # Fallback to JS
+                return _PLAYBACK_OPS[intent]
 
             # Skip patterns — extract number from text first ("skip 30" → 30s)
-            import re
-            num_in_text = re.search(r'\b(\d+)\b', text)
-            for phrase, default_secs in sorted(SKIP_PATTERNS.items(), key=lambda x: -len(x[0])):
-                if phrase in text:
-                    if num_in_text:
-                        actual = int(num_in_text.group(1))
-                        actual = actual if default_secs > 0 else -actual
-                    else:
-                        actual = default_secs
-                    return {"tool": "dom_op", "args": {"op": "video_seek", "value": str(actual)}}
+            num_in_text = _ANYNUM_RE.search(text)
+            hit = phrases.get("skip")
+            if hit:
+                phrase, default_secs = hit
+                if num_in_text:
+                    actual = int(num_in_text.group(1))
+                    actual = actual if default_secs > 0 else -actual
+                else:
+                    actual = default_secs
+                return {"tool": "dom_op", "args": {"op": "video_seek", "value": str(actual)}}
 
             # Speed patterns — longest-first
-            for phrase, speed in sorted(SPEED_PATTERNS.items(), key=lambda x: -len(x[0])):
-                if phrase in text:
-                    if phrase in ("faster", "slower"):
-                        last_speed = getattr(self, 'last_speed', 1.0)
-                        new_speed = round(max(0.25, min(2.0, last_speed + speed)), 2)
-                    else:
-                        new_speed = speed
-                        self.last_speed = new_speed
-                    return {"tool": "dom_op", "args": {"op": "video_speed", "value": str(new_speed)}}
+            hit = phrases.get("speed")
+            if hit:
+                phrase, speed = hit
+                if phrase in ("faster", "slower"):
+                    last_speed = getattr(self, 'last_speed', 1.0)
+                    new_speed = round(max(0.25, min(2.0, last_speed + speed)), 2)
+                else:
+                    new_speed = speed
+                    self.last_speed = new_speed
+                return {"tool": "dom_op", "args": {"op": "video_speed", "value": str(new_speed)}}
 
         # ── Brightness context ────────────────────────────────────────────────
-        if subject == "brightness" or "brightness" in text or "screen" in text:
-            import re
-            num_match = re.search(r'\b(\d{1,3})\b', text)
+        if subject is Subject.BRIGHTNESS or _BRIGHT_CUE_RE.search(text):
+            num_match = _NUM_RE.search(text)
             if num_match:
                 level = max(0, min(100, int(num_match.group(1))))
                 return {"tool": "set_brightness", "args": {"level": level}}
 
-            for phrase, delta in sorted(BRIGHTNESS_ADJUSTMENTS.items(), key=lambda x: -len(x[0])):
-                if phrase in text:
-                    if isinstance(delta, int) and delta in (100, 10, 20, 80):
-                        new_level = delta  # absolute
-                    else:
-                        new_level = max(0, min(100, self.last_brightness + delta))
-                    return {"tool": "set_brightness", "args": {"level": new_level}}
+            hit = phrases.get("brightness")
+            if hit:
+                phrase, delta = hit
+                if isinstance(delta, int) and delta in (100, 10, 20, 80):
+                    new_level = delta  # absolute
+                else:
+                    new_level = max(0, min(100, self.last_brightness + delta))
+                return {"tool": "set_brightness", "args": {"level": new_level}}
 
         # ── File context ──────────────────────────────────────────────────────
-        if subject == "file" and self.last_file:
-            if "open" in text or "read" in text or "show" in text:
+        if subject is Subject.FILE and self.last_file:
+            if _FILE_OPEN_RE.search(text):
                 return {"tool": "read_file", "args": {"path": self.last_file}}
-            if "delete" in text or "remove" in text:
+            if _FILE_DEL_RE.search(text):
                 return {"tool": "delete_file", "args": {"path": self.last_file}}
 
         return None  # Let LLM handle it
 
+    def signature(self) -> tuple:
+        """Cheap hashable key — changes whenever as_prompt_context() would."""
+        la = self.last_action
+        fresh = la is not None and time.monotonic() - la.timestamp < 300
+        return self._version, fresh
+
     def _tool_map_has(self, tool: str) -> bool:
         """Check if tool exists (set externally)."""
         return False  # will be overridden
 
     def as_prompt_context(self) -> str:
         """Build context string injected into every system prompt."""
+        sig = self.signature()
+        if self._prompt_memo[0] == sig:   # no update() and freshness unchanged since last build
+            return self._prompt_memo[1]
         parts = []
 
         if self.last_action:
             la = self.last_action
-            age = (datetime.now() - la.timestamp).seconds
-            if age < 300:  # Only inject if within 5 minutes
+            if sig[1]:  # Only inject if within 5 minutes
                 parts.append(
                     f"LAST ACTION: {la.tool}({la.args}) → \"{la.result[:80]}\""
                     f"  [site={la.site or 'unknown'}, subject={la.subject}]"
@@ -403,12 +545,12 @@ class SessionContext:
             parts.append(f"CURRENT URL: {self.current_url}")
 
         # Hint about follow-up handling
-        if self.last_action and self.last_action.subject == "volume":
+        if self.last_action and self.last_action.subject is Subject.VOLUME:
             parts.append(
                 f"VOLUME STATE: system={self.last_volume}%, "
                 f"youtube={self.last_yt_vol}%"
             )
-        if self.last_action and self.last_action.subject == "brightness":
+        if self.last_action and self.last_action.subject is Subject.BRIGHTNESS:
             parts.append(f"BRIGHTNESS STATE: {self.last_brightness}%")
 
         if parts:
@@ -419,7 +561,9 @@ class SessionContext:
                 "Always use the active context to infer the full intent."
             )
 
-        return "\n".join(parts)
+        text = "\n".join(parts)
+        self._prompt_memo = (sig, text)
+        return text
 
 
 # Global singleton
@@ -7,11 +7,16 @@ before execution. Used by agent for long-horizon tasks.
 import os
 import json
 import re
+try:
+    from orjson import loads as _loads   # optional: faster plan parsing
+except ImportError:
+    _loads = json.loads
 from typing import Optional
+from functools import lru_cache
 from dataclasses import dataclass, field
 
 
-@dataclass
+@dataclass(slots=True)
 class Step:
     order:       int
     description: str
@@ -20,7 +25,7 @@ class Step:
     depends_on:  list = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class Plan:
     goal:     str
     steps:    list
@@ -31,52 +36,61 @@ class Plan:
 
 _PATTERNS = [
     # "install X and Y" → two install steps
-    (r"install (\w[\w-]*) (?:and|&) (\w[\w-]*)", lambda m: [
+    (re.compile(r"install (\w[\w-]*) (?:and|&) (\w[\w-]*)"), lambda m: [
         Step(1, f"Install {m.group(1)}", "install_package", {"package": m.group(1)}),
         Step(2, f"Install {m.group(2)}", "install_package", {"package": m.group(2)}),
     ]),
     # "move X to Y then open it" → move + launch
-    (r"move (.+?) to (.+?) (?:then |and )?open it", lambda m: [
+    (re.compile(r"move (.+?) to (.+?) (?:then |and )?open it"), lambda m: [
         Step(1, f"Move file", "move_file", {"source": m.group(1).strip(), "destination": m.group(2).strip()}),
         Step(2, f"Open file", "launch_app", {"app_name": m.group(2).strip()}),
     ]),
     # "zip/archive folder X and upload to Y" → archive + navigate
-    (r"(?:zip|archive) (.+?) (?:and (?:upload|send) to) (.+)", lambda m: [
+    (re.compile(r"(?:zip|archive) (.+?) (?:and (?:upload|send) to) (.+)"), lambda m: [
         Step(1, f"Archive {m.group(1)}", "archive_files",
              {"path": m.group(1).strip(), "output": m.group(1).strip() + ".zip"}),
         Step(2, f"Navigate to {m.group(2)}", "navigate",
              {"url": m.group(2).strip() if "http" in m.group(2) else "https://" + m.group(2).strip()}),
     ]),
     # "connect wifi X then bluetooth Y" → two connects
-    (r"connect (?:to )?wifi (.+?) (?:then|and) (?:connect )?(?:to )?bluetooth (.+)", lambda m: [
-        Step(1, f"Connect WiFi {m.group(1)}", "connect_wifi", {"ssid": m.group(1).strip()}, parallel=False),
+    (re.compile(r"connect (?:to )?wifi (.+?) (?:then|and) (?:connect )?(?:to )?bluetooth (.+)"), lambda m: [
+        Step(1, f"Connect WiFi {m.group(1)}", "connect_wifi", {"ssid": m.group(1).strip()}),
         Step(2, f"Connect BT {m.group(2)}", "connect_bluetooth",
              {"name_or_mac": m.group(2).strip()}, depends_on=[1]),
     ]),
     # "search X and open first result"
-    (r"search (?:for )?(.+?) and open (?:the )?first (?:result|link)", lambda m: [
+    (re.compile(r"search (?:for )?(.+?) and open (?:the )?first (?:result|link)"), lambda m: [
         Step(1, f"Search {m.group(1)}", "web_search", {"query": m.group(1).strip()}),
         Step(2, "Open first result", "navigate", {"url": "RESULT_FROM_STEP_1"}),
     ]),
     # "read file X and summarize" / "read X and tell me"
-    (r"(?:read|open|show) (?:file )?(.+?) and (?:summarize|tell|explain|describe)", lambda m: [
+    (re.compile(r"(?:read|open|show) (?:file )?(.+?) and (?:summarize|tell|explain|describe)"), lambda m: [
         Step(1, f"Read {m.group(1)}", "read_file", {"path": m.group(1).strip()}),
         Step(2, "Summarize content", "_llm_summarize", {"source_step": 1}),
     ]),
 ]
 
 
-def local_plan(task: str) -> Optional[Plan]:
-    """Try to build a plan from simple heuristic patterns."""
-    task_lower = task.lower().strip()
-    for pattern, builder in _PATTERNS:
-        m = re.search(pattern, task_lower)
+@lru_cache(maxsize=256)
+def _local_plan_impl(task_lower: str) -> Optional[tuple]:
+    """Pattern scan for one normalised task — repeats are a single cache hit."""
+    for rx, builder in _PATTERNS:
+        m = rx.search(task_lower)
         if m:
-            steps = builder(m)
-            return Plan(goal=task, steps=steps)
+            return tuple((s.order, s.description, s.tool, s.args, s.depends_on) for s in builder(m))
     return None
 
 
+def local_plan(task: str) -> Optional[Plan]:
+    """Try to build a plan from simple heuristic patterns."""
+    cached = _local_plan_impl(task.lower().strip())
+    if cached is None:
+        return None
+    # Fresh Step objects (and arg dicts) every call — callers may mutate them
+    steps = [Step(o, d, t, dict(a), list(dep)) for o, d, t, a, dep in cached]
+    return Plan(goal=task, steps=steps)
+
+
 # ── LLM planner (for complex multi-step tasks) ─────────────────────────────────
 
 PLANNER_SYSTEM = """You are Friday's task planner.
@@ -108,6 +122,10 @@ Rules:
 """
 
 
+# Opening and closing code fences stripped in one pass
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$", re.MULTILINE)
+
+
 def llm_plan(task: str, client, model: str) -> Optional[Plan]:
     """Use LLM to decompose a complex task into steps."""
     try:
@@ -121,9 +139,7 @@ def llm_plan(task: str, client, model: str) -> Optional[Plan]:
             temperature=0.1,
         )
         raw = resp.choices[0].message.content or ""
-        raw = re.sub(r"^```(?:json)?\s*", "", raw, flags=re.MULTILINE)
-        raw = re.sub(r"\s*```$",          "", raw, flags=re.MULTILINE).strip()
-        data = json.loads(raw)
+        data = _loads(_FENCE_RE.sub("", raw).strip())
         steps = [
             Step(
                 order=s["order"],
@@ -153,13 +169,29 @@ _COMPLEX_VERBS = [
 ]
 
 
+_COMPLEX_RE = re.compile("|".join(map(re.escape, _COMPLEX_VERBS)))
+
+# One lookahead scan reports, per position, the longest indicator starting there.
+# Each hit also implies every indicator it contains ("and then" ⊃ "then"),
+# so the union below is exactly the set of indicators present in the task.
+_MULTI_RE = re.compile("(?=(" + "|".join(map(re.escape, sorted(_MULTI_INDICATORS, key=len, reverse=True))) + "))")
+_MULTI_IMPLIES = {i: frozenset(j for j in _MULTI_INDICATORS if j in i) for i in _MULTI_INDICATORS}
+
+
 def needs_planning(task: str) -> bool:
     """Heuristic: should this task be pre-planned?"""
+    # Cheapest checks first — each one alone is enough
+    if len(task.split()) > 20:
+        return True
     task_lower = task.lower()
-    multi = sum(1 for i in _MULTI_INDICATORS if i in task_lower)
-    complex_ = any(v in task_lower for v in _COMPLEX_VERBS)
-    word_count = len(task.split())
-    return multi >= 2 or complex_ or word_count > 20
+    if _COMPLEX_RE.search(task_lower):
+        return True
+    found = set()
+    for m in _MULTI_RE.finditer(task_lower):
+        found |= _MULTI_IMPLIES[m.group(1)]
+        if len(found) >= 2:
+            return True
+    return False
 
 
 def format_plan(plan: Plan) -> str:
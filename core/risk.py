@@ -5,18 +5,27 @@ RECOVERABLE → run + log undo
 DANGEROUS → require y/n
 """
 
-from enum import Enum
+import re
+from enum import IntEnum
+from functools import lru_cache
 from dataclasses import dataclass
 from typing import Optional
 
 
-class Risk(str, Enum):
-    SAFE        = "SAFE"
-    RECOVERABLE = "RECOVERABLE"
-    DANGEROUS   = "DANGEROUS"
+class Risk(IntEnum):
+    """Ordered by severity, so max() combines classifications."""
+    SAFE        = 0
+    RECOVERABLE = 1
+    DANGEROUS   = 2
 
+    def __str__(self):
+        return self.name
 
-@dataclass
+    def __format__(self, spec):
+        return format(self.name, spec)
+
+
+@dataclass(slots=True, frozen=True)
 class RiskResult:
     level:    Risk
     reason:   str
@@ -73,6 +82,20 @@ _RECOVERABLE_CONTAINS = [
     "chmod ","chown ","docker start","docker stop","docker run",
 ]
 
+# Lower-cased once at import — classify_cmd compares against these directly
+_DANGER_CMD_LC           = tuple((p.lower(), r) for p, r in _DANGER_CMD)
+_SAFE_STARTS_LC          = tuple(s.lower() for s in _SAFE_STARTS)
+_RECOVERABLE_CONTAINS_LC = tuple(s.lower() for s in _RECOVERABLE_CONTAINS)
+
+# Each table as one compiled alternation — a single scan per table. SRE derives a
+# first-character set from the alternatives and skips positions that cannot start
+# any pattern, so no separate prefilter is needed. Safe starts are matched at the
+# start only, longest first. On a danger hit (rare) the table is walked in order
+# so the first-listed pattern still wins.
+_DANGER_RE      = re.compile("|".join(re.escape(p) for p, _ in _DANGER_CMD_LC))
+_SAFE_RE        = re.compile("|".join(map(re.escape, sorted(_SAFE_STARTS_LC, key=len, reverse=True))))
+_RECOVERABLE_RE = re.compile("|".join(map(re.escape, _RECOVERABLE_CONTAINS_LC)))
+
 # ── Browser dangerous ops ──────────────────────────────────────────────────────
 
 _DANGER_BROWSER = {
@@ -82,42 +105,125 @@ _DANGER_BROWSER = {
     "execute_arbitrary": "Runs arbitrary JavaScript on the page",
 }
 
-_SAFE_BROWSER = {
+_SAFE_BROWSER = frozenset({
     "navigate", "scroll", "get_text", "get_html", "screenshot",
     "get_tabs", "get_url", "get_title", "get_cookies", "read_page",
     "extract_table", "find_element", "get_storage",
-}
+})
 
-_RECOVERABLE_BROWSER = {
+_RECOVERABLE_BROWSER = frozenset({
     "click", "fill_input", "select_option", "check_box", "fill_form",
     "close_tab", "open_tab", "focus_tab", "auto_login", "replay_session",
     "trigger_download", "fill_saved_form",
-}
+})
+
+
+# ── System tools ───────────────────────────────────────────────────────────────
 
+_SAFE_SYS = frozenset({"get_volume","list_wifi_networks","get_saved_wifi","list_bt_devices",
+                      "system_info","list_processes","disk_usage","get_ip","list_packages",
+                      "safe_shell","show_history","db_stats","get_clipboard","read_file",
+                      "list_dir","file_search","net_info","speed_test","env_read",
+                      "list_aliases","list_habits","list_reminders","list_goals","list_notes",
+                      "list_facts","list_snippets","vault_list","list_credentials","list_sessions",
+                      "list_watchers","get_time","pomodoro_status","list_cron"})
+_REC_SYS = frozenset({"set_volume","mute_volume","connect_wifi","disconnect_wifi","save_wifi_creds",
+                     "connect_bluetooth","disconnect_bluetooth","pair_bluetooth",
+                     "move_file","copy_file","create_dir","install_package","uninstall_package",
+                     "kill_process","service_action","set_brightness","lock_screen","launch_app",
+                     "set_clipboard","write_file","create_alias","run_alias","add_reminder",
+                     "add_goal","add_fact","add_note","save_snippet","vault_save","save_credential",
+                     "add_watcher","remove_watcher","add_cron","remove_cron","run_python",
+                     "archive_files","extract_archive","bulk_rename","env_write",
+                     "start_pomodoro","stop_pomodoro","start_timer","network_scan"})
+_DANGER_SYS = frozenset({"force_delete", "format_disk", "shutdown_system", "reboot_system"})
 
+# System paths delete_file refuses without confirmation — the path itself or anything below it
+_DANGER_PATHS_EXACT  = frozenset({"/", "/etc", "/usr", "/bin", "/sbin", "/lib", "/boot", "/sys", "/proc"})
+_DANGER_PATHS_PREFIX = tuple(d + "/" for d in _DANGER_PATHS_EXACT)
+
+
+# Shared results for the cases that carry no per-call data
+_SAFE_READONLY      = RiskResult(Risk.SAFE, "Read-only operation")
+_SAFE_BROWSER_RO    = RiskResult(Risk.SAFE, "Read-only browser operation")
+_SAFE_SYS_RO        = RiskResult(Risk.SAFE, "Read-only")
+_REC_UNKNOWN        = RiskResult(Risk.RECOVERABLE, "Unknown — logged for safety")
+_REC_UNKNOWN_TOOL   = RiskResult(Risk.RECOVERABLE, "Unknown tool — logged")
+
+# Danger table partially evaluated: (pattern, prebuilt DANGEROUS result), in table order
+_DANGER_RESULTS = tuple((p, RiskResult(Risk.DANGEROUS, r, warn_msg=f"⚠ IRREVERSIBLE: {r}"))
+                        for p, r in _DANGER_CMD_LC)
+_DANGER_RANK = {p: i for i, (p, _) in enumerate(_DANGER_CMD_LC)}
+
+# Tools whose classification reads args — everything else resolves from the name alone
+_ARG_TOOLS = _RECOVERABLE_BROWSER | _REC_SYS | {"delete_file"}
+
+
+@lru_cache(maxsize=2048)
 def classify_cmd(cmd: str) -> RiskResult:
     cmd_lower = cmd.lower().strip()
 
-    for pattern, reason in _DANGER_CMD:
-        if pattern.lower() in cmd_lower:
-            return RiskResult(Risk.DANGEROUS, reason,
-                              warn_msg=f"⚠ IRREVERSIBLE: {reason}")
+    m = _DANGER_RE.search(cmd_lower)
+    if m:
+        # Only patterns listed before the one found can outrank it — check just those
+        hit = _DANGER_RANK[m.group()]
+        for pattern, result in _DANGER_RESULTS[:hit]:
+            if pattern in cmd_lower:
+                return result
+        return _DANGER_RESULTS[hit][1]
+
+    if _SAFE_RE.match(cmd_lower):
+        return _SAFE_READONLY
+
+    if _RECOVERABLE_RE.search(cmd_lower):
+        undo = _undo_for_cmd(cmd)
+        return RiskResult(Risk.RECOVERABLE, "Reversible operation", undo_cmd=undo)
 
-    for s in _SAFE_STARTS:
-        if cmd_lower.startswith(s.lower()):
-            return RiskResult(Risk.SAFE, "Read-only operation")
+    return _REC_UNKNOWN
 
-    for s in _RECOVERABLE_CONTAINS:
-        if s.lower() in cmd_lower:
-            undo = _undo_for_cmd(cmd)
-            return RiskResult(Risk.RECOVERABLE, "Reversible operation", undo_cmd=undo)
 
-    return RiskResult(Risk.RECOVERABLE, "Unknown — logged for safety")
+def classify_cmds(cmds) -> list:
+    """Classify many commands (history audits, scripts) — each distinct command is classified once."""
+    # Batch-local memo: bulk audits neither evict nor depend on classify_cmd's interactive LRU
+    memo = {}
+    classify = classify_cmd.__wrapped__
+    return [memo[c] if c in memo else memo.setdefault(c, classify(c)) for c in cmds]
+
+
+# The only args _classify_tool / _undo_for_tool read — the cache key is built from
+# these alone, so payloads (passwords, file content, code) are never retained
+_RISK_ARG_KEYS = {
+    "delete_file":     ("path",),
+    "move_file":       ("source", "destination"),
+    "create_dir":      ("path",),
+    "install_package": ("manager", "package"),
+    "service_action":  ("action", "name"),
+    "connect_wifi":    ("ssid",),
+}
 
 
 def classify_tool(tool: str, args: dict) -> RiskResult:
+    """Name-only tools hit a prebuilt table; the rest are cached by (tool, the args they read)."""
+    r = _STATIC_TOOL_RISK.get(tool)
+    if r is not None:
+        return r
+    if tool not in _ARG_TOOLS:
+        return _REC_UNKNOWN_TOOL
+    key = tuple((k, type(v), v) for k in _RISK_ARG_KEYS.get(tool, ()) if k in args for v in (args[k],))
+    try:
+        return _classify_tool_cached(tool, key)
+    except TypeError:   # unhashable arg value — classify uncached
+        return _classify_tool(tool, args)
+
+
+@lru_cache(maxsize=2048)
+def _classify_tool_cached(tool: str, key: tuple) -> RiskResult:
+    return _classify_tool(tool, {k: v for k, _, v in key})
+
+
+def _classify_tool(tool: str, args: dict) -> RiskResult:
     if tool in _SAFE_BROWSER:
-        return RiskResult(Risk.SAFE, "Read-only browser operation")
+        return _SAFE_BROWSER_RO
     if tool in _DANGER_BROWSER:
         return RiskResult(Risk.DANGEROUS, _DANGER_BROWSER[tool],
                           warn_msg=f"⚠ {_DANGER_BROWSER[tool]}")
@@ -125,72 +231,67 @@ def classify_tool(tool: str, args: dict) -> RiskResult:
         undo = _undo_for_tool(tool, args)
         return RiskResult(Risk.RECOVERABLE, "Reversible browser operation", undo_cmd=undo)
 
-    # System tools
-    _safe_sys = {"get_volume","list_wifi_networks","get_saved_wifi","list_bt_devices",
-                 "system_info","list_processes","disk_usage","get_ip","list_packages",
-                 "safe_shell","show_history","db_stats","get_clipboard","read_file",
-                 "list_dir","file_search","net_info","speed_test","env_read",
-                 "list_aliases","list_habits","list_reminders","list_goals","list_notes",
-                 "list_facts","list_snippets","vault_list","list_credentials","list_sessions",
-                 "list_watchers","get_time","pomodoro_status","list_cron"}
-    _rec_sys = {"set_volume","mute_volume","connect_wifi","disconnect_wifi","save_wifi_creds",
-                "connect_bluetooth","disconnect_bluetooth","pair_bluetooth",
-                "move_file","copy_file","create_dir","install_package","uninstall_package",
-                "kill_process","service_action","set_brightness","lock_screen","launch_app",
-                "set_clipboard","write_file","create_alias","run_alias","add_reminder",
-                "add_goal","add_fact","add_note","save_snippet","vault_save","save_credential",
-                "add_watcher","remove_watcher","add_cron","remove_cron","run_python",
-                "archive_files","extract_archive","bulk_rename","env_write",
-                "start_pomodoro","stop_pomodoro","start_timer","network_scan"}
-    _danger_sys = {"force_delete", "format_disk", "shutdown_system", "reboot_system"}
-
     # delete_file is RECOVERABLE for normal paths, DANGEROUS only for system paths
     if tool == "delete_file":
         path = str(args.get("path", ""))
-        danger_paths = {"/", "/etc", "/usr", "/bin", "/sbin", "/lib", "/boot", "/sys", "/proc"}
-        is_danger = any(path == d or path.startswith(d + "/") for d in danger_paths)
-        if is_danger:
+        if path in _DANGER_PATHS_EXACT or path.startswith(_DANGER_PATHS_PREFIX):
             return RiskResult(Risk.DANGEROUS, f"System path deletion: {path}",
                               warn_msg=f"⚠ Deleting system path: {path}")
         return RiskResult(Risk.RECOVERABLE, "Moved to trash", undo_cmd=f"# restore from trash: {path}")
 
-    if tool in _safe_sys:   return RiskResult(Risk.SAFE, "Read-only")
-    if tool in _rec_sys:    return RiskResult(Risk.RECOVERABLE, "Reversible", undo_cmd=_undo_for_tool(tool, args))
-    if tool in _danger_sys: return RiskResult(Risk.DANGEROUS, f"Irreversible: {tool}",
+    if tool in _SAFE_SYS:   return _SAFE_SYS_RO
+    if tool in _REC_SYS:    return RiskResult(Risk.RECOVERABLE, "Reversible", undo_cmd=_undo_for_tool(tool, args))
+    if tool in _DANGER_SYS: return RiskResult(Risk.DANGEROUS, f"Irreversible: {tool}",
                                               warn_msg=f"⚠ This will {tool.replace('_',' ')} — irreversible")
 
-    return RiskResult(Risk.RECOVERABLE, "Unknown tool — logged")
+    return _REC_UNKNOWN_TOOL
+
+
+_STATIC_TOOL_RISK = {t: _classify_tool(t, {})
+                     for t in _SAFE_BROWSER | _DANGER_BROWSER.keys() | _SAFE_SYS | _DANGER_SYS
+                     if t not in _ARG_TOOLS}
 
 
 def _undo_for_cmd(cmd: str) -> Optional[str]:
-    parts = cmd.strip().split()
+    parts = cmd.split()   # split() already drops surrounding whitespace
     if not parts: return None
     base = parts[0].lower()
     if base == "mv" and len(parts) == 3:
         return f"mv '{parts[2]}' '{parts[1]}'"
     if base == "mkdir":
         return f"rmdir '{parts[-1]}'"
-    if "pip" in base and "install" in cmd:
+    # Every remaining undo reverses an install — one scan rules them all out
+    if "install" not in cmd:
+        return None
+    if "pip" in base:
         pkgs = [p for p in parts[2:] if not p.startswith("-")]
         return f"pip uninstall -y {' '.join(pkgs)}" if pkgs else None
-    if "apt" in cmd and "install" in cmd:
+    if "apt" in cmd:
         pkgs = [p for p in parts if p not in ("apt","apt-get","install") and not p.startswith("-")]
         return f"sudo apt remove -y {' '.join(pkgs)}" if pkgs else None
-    if "brew" in cmd and "install" in cmd:
+    if "brew" in cmd:
         pkgs = [p for p in parts if p not in ("brew","install") and not p.startswith("-")]
         return f"brew uninstall {' '.join(pkgs)}" if pkgs else None
     return None
 
 
+def _undo_install(a):
+    m, p = a.get("manager","pip"), a.get("package","")
+    return {"pip":f"pip uninstall -y {p}","apt":f"sudo apt remove -y {p}","brew":f"brew uninstall {p}"}.get(m)
+
+_SERVICE_INVERSE = {"start":"stop","stop":"start","enable":"disable","disable":"enable"}
+
+# tool → fn(args) returning the undo command
+_UNDO_DISPATCH = {
+    "move_file":       lambda a: f"mv '{a.get('destination','')}' '{a.get('source','')}'",
+    "create_dir":      lambda a: f"rmdir '{a.get('path','')}'",
+    "install_package": _undo_install,
+    "service_action":  lambda a: f"systemctl {_SERVICE_INVERSE.get(a.get('action',''),'status')} {a.get('name','')}",
+    "connect_wifi":    lambda a: f"nmcli connection down \"{a.get('ssid','')}\"",
+    "close_tab":       lambda a: "# Cannot reopen closed tab automatically",
+}
+
+
 def _undo_for_tool(tool: str, args: dict) -> Optional[str]:
-    if tool == "move_file":      return f"mv '{args.get('destination','')}' '{args.get('source','')}'"
-    if tool == "create_dir":     return f"rmdir '{args.get('path','')}'"
-    if tool == "install_package":
-        m, p = args.get("manager","pip"), args.get("package","")
-        return {"pip":f"pip uninstall -y {p}","apt":f"sudo apt remove -y {p}","brew":f"brew uninstall {p}"}.get(m)
-    if tool == "service_action":
-        inv = {"start":"stop","stop":"start","enable":"disable","disable":"enable"}
-        return f"systemctl {inv.get(args.get('action',''),'status')} {args.get('name','')}"
-    if tool == "connect_wifi":   return f"nmcli connection down \"{args.get('ssid','')}\""
-    if tool == "close_tab":      return "# Cannot reopen closed tab automatically"
-    return None
+    h = _UNDO_DISPATCH.get(tool)
+    return h(args) if h else None
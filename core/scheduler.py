@@ -2,10 +2,55 @@
 Friday Scheduler — proactive features
 Morning digest, reminder polling, escalation, anomaly alerts.
 """
-import threading, time, schedule
-from datetime import datetime
+import threading, time
+from datetime import datetime, timedelta
 from tools.notifier import notify, alert
-from db.database import get_due_reminders, complete_reminder, escalate_reminder, list_goals, get_pref
+try:
+    from tools.web_tools import get_weather
+except ImportError:   # weather is optional — the rest of the briefing still runs
+    get_weather = None
+from db.database import (get_due_reminders, complete_reminder, escalate_reminder, list_goals, get_pref,
+                         get_pending_reminders, count_history_since)
+
+
+_REMINDER_INTERVAL = 60   # seconds between due-reminder checks
+
+
+def _next_daily(hhmm, now):
+    """Next wall-clock occurrence of 'HH:MM' (or 'HH:MM:SS') strictly after now."""
+    at = datetime.strptime(hhmm, "%H:%M:%S" if hhmm.count(":") == 2 else "%H:%M").time()
+    nxt = datetime.combine(now.date(), at)
+    return nxt if nxt > now else nxt + timedelta(days=1)
+
+
+def _safe(fn, *args, **kwargs):
+    """Run one briefing section; a failing section is skipped, not fatal."""
+    try:
+        return fn(*args, **kwargs)
+    except Exception:
+        return None
+
+
+def _weather_lines(loc):
+    if get_weather is None:
+        return []
+    return [get_weather(loc).out[:300]]
+
+
+def _reminder_lines():
+    reminders = get_pending_reminders()
+    if not reminders:
+        return []
+    return [f"\n⏰ {len(reminders)} reminder(s) pending:",
+            *(f"  · {r['text']} (due {r['due_time'][11:16]})" for r in reminders[:3])]
+
+
+def _goal_lines():
+    goals = list_goals("active")
+    if not goals:
+        return []
+    return [f"\n🎯 {len(goals)} active goal(s):",
+            *(f"  · {g['title']} — {g['progress']}%" for g in goals[:3])]
 
 
 class FridayScheduler(threading.Thread):
@@ -13,50 +58,46 @@ class FridayScheduler(threading.Thread):
         super().__init__(daemon=True)
         self.agent_callback = agent_callback  # fn(text) → send proactive message to REPL
         self._stop = threading.Event()
+        self.location = "New York"
 
     def run(self):
         morning_time = get_pref("morning_briefing_time", "08:00")
         evening_time = get_pref("evening_summary_time", "21:00")
+        self.location = get_pref("location", "New York")   # read once, not every morning
 
-        schedule.every().day.at(morning_time).do(self._morning_briefing)
-        schedule.every().day.at(evening_time).do(self._evening_summary)
-        schedule.every(60).seconds.do(self._check_reminders)
+        # [next due, "HH:MM", job] — sleep until the nearest deadline instead of polling every second
+        now = datetime.now()
+        daily = [[_next_daily(morning_time, now), morning_time, self._morning_briefing],
+                 [_next_daily(evening_time, now), evening_time, self._evening_summary]]
+        next_check = time.monotonic() + _REMINDER_INTERVAL
 
-        while not self._stop.wait(1):
-            schedule.run_pending()
+        while True:
+            now  = datetime.now()
+            wait = min(next_check - time.monotonic(), *((due - now).total_seconds() for due, _, _ in daily))
+            if self._stop.wait(max(0, wait)):
+                break
+            for job in daily:
+                if job[0] <= datetime.now():
+                    job[2]()
+                    job[0] = _next_daily(job[1], datetime.now())
+            if time.monotonic() >= next_check:
+                self._check_reminders()
+                next_check = time.monotonic() + _REMINDER_INTERVAL
 
     def _morning_briefing(self):
         lines = ["☀️  Good morning! Here's your Friday briefing:\n"]
-        try:
-            from tools.web_tools import get_weather, get_datetime
-            loc = get_pref("location","New York")
-            wx = get_weather(loc); lines.append(wx.out[:300])
-        except Exception: pass
-        try:
-            from db.database import get_pending_reminders
-            reminders = get_pending_reminders()
-            if reminders:
-                lines.append(f"\n⏰ {len(reminders)} reminder(s) pending:")
-                for r in reminders[:3]:
-                    lines.append(f"  · {r['text']} (due {r['due_time'][11:16]})")
-        except Exception: pass
-        try:
-            goals = list_goals("active")
-            if goals:
-                lines.append(f"\n🎯 {len(goals)} active goal(s):")
-                for g in goals[:3]:
-                    lines.append(f"  · {g['title']} — {g['progress']}%")
-        except Exception: pass
+        lines += _safe(_weather_lines, self.location) or ()
+        lines += _safe(_reminder_lines) or ()
+        lines += _safe(_goal_lines) or ()
         msg = "\n".join(lines)
         notify("⚡ Friday Morning Briefing", "Your daily summary is ready")
         if self.agent_callback: self.agent_callback(msg)
 
     def _evening_summary(self):
         try:
-            from db.database import get_history
             today = datetime.now().strftime("%Y-%m-%d")
-            history = [h for h in get_history(50) if h["ts"].startswith(today)]
-            msg = f"🌙 Evening Summary — {len(history)} commands today"
+            count = count_history_since(f"{today} 00:00:00")
+            msg = f"🌙 Evening Summary — {count} commands today"
             notify("⚡ Friday Evening", msg)
             if self.agent_callback: self.agent_callback(msg)
         except Exception: pass
@@ -76,4 +117,3 @@ class FridayScheduler(threading.Thread):
 
     def stop(self):
         self._stop.set()
-        schedule.clear()
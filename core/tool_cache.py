@@ -0,0 +1,73 @@
+"""
+Friday Tool Cache — short-lived results for read-only tools
+Back-to-back calls with identical args (weather, stock, wiki, ...)
+are answered from memory instead of hitting the network again.
+Only tools listed in TOOL_TTLS are ever cached.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+MAX_ENTRIES = 512
+
+# Seconds a successful result stays valid. State-mutating tools must never appear here.
+TOOL_TTLS = {
+    "wikipedia":        3600,
+    "get_location":     3600,
+    "get_weather":      600,
+    "convert_currency": 300,
+    "web_search":       300,
+    "fetch_page":       300,
+    "get_ip":           60,
+    "get_stock":        30,
+    "disk_usage":       10,
+    "system_info":      5,
+    "net_info":         5,
+    "get_datetime":     1,
+}
+
+_store = OrderedDict()   # (tool, args_key) → (expiry, result)
+_lock  = threading.Lock()
+
+
+def _key(tool, a):
+    return tool, json.dumps(sorted(a.items()), default=str)
+
+
+def cached(tool, ttl):
+    """Wrap a TOOL_MAP handler `fn(args)` with an LRU + TTL cache."""
+    def deco(fn):
+        @wraps(fn)
+        def _call(a):
+            k   = _key(tool, a)
+            now = time.monotonic()
+            with _lock:
+                hit = _store.get(k)
+                if hit and hit[0] > now:
+                    _store.move_to_end(k)
+                    return hit[1]
+            result = fn(a)
+            # never cache failures, nor fallbacks that mark themselves cacheable=False
+            if getattr(result, "ok", False) and getattr(result, "cacheable", True):
+                with _lock:
+                    _store[k] = (now + ttl, result)
+                    _store.move_to_end(k)
+                    while len(_store) > MAX_ENTRIES:
+                        _store.popitem(last=False)
+            return result
+        return _call
+    return deco
+
+
+def wrap_tools(tool_map: dict) -> dict:
+    """Return tool_map with every TOOL_TTLS entry wrapped in its cache."""
+    return {name: cached(name, TOOL_TTLS[name])(fn) if name in TOOL_TTLS else fn
+            for name, fn in tool_map.items()}
+
+
+def clear():
+    with _lock:
+        _store.clear()
@@ -6,32 +6,78 @@ All persistent state lives here.
 
 import sqlite3
 import json
+try:
+    from orjson import loads as _loads   # optional: faster decode of stored JSON columns
+except ImportError:
+    _loads = json.loads
 import hashlib
+import logging
+import queue
+import time
+import atexit
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Optional
 from contextlib import contextmanager
 
 DB_PATH = Path.home() / ".friday" / "friday.db"
+log = logging.getLogger("friday.db")
 
 
-@contextmanager
-def conn():
+# One long-lived connection per thread — opened (and PRAGMAs applied) on first use.
+# It is closed when its thread ends and the thread-local is collected.
+_tls = threading.local()
+
+def _connect():
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    c = sqlite3.connect(str(DB_PATH), timeout=10)
+    # Statement cache large enough for every distinct SQL string in this module —
+    # a long-lived connection then prepares each statement once
+    c = sqlite3.connect(str(DB_PATH), timeout=10, cached_statements=512)
     c.row_factory = sqlite3.Row
     c.execute("PRAGMA journal_mode=WAL")
     c.execute("PRAGMA synchronous=NORMAL")
     c.execute("PRAGMA foreign_keys=ON")
     c.execute("PRAGMA cache_size=-32000")
+    c.execute("PRAGMA mmap_size=268435456")   # 256 MiB — reads served from mapped pages
+    c.execute("PRAGMA temp_store=MEMORY")     # sorts / temp indexes never touch disk
+    return c
+
+def _thread_conn():
+    c = getattr(_tls, "c", None)
+    if c is None:
+        c = _tls.c = _connect()
+        _tls.depth = 0
+    return c
+
+@contextmanager
+def conn():
+    """This thread's connection; commits (or rolls back) when the outermost block exits.
+    Nested blocks run under a SAVEPOINT, so a failed inner block undoes only its own writes."""
+    c = _thread_conn()
+    _tls.depth += 1
+    sp = None
     try:
+        if _tls.depth > 1:
+            # the savepoint must sit inside a transaction, or RELEASE would commit it on its own
+            if not c.in_transaction: c.execute("BEGIN")
+            sp = f"friday_sp{_tls.depth}"
+            c.execute(f"SAVEPOINT {sp}")
         yield c
-        c.commit()
+        if sp: c.execute(f"RELEASE {sp}")
+        else:  c.commit()
     except Exception:
-        c.rollback()
+        if sp:
+            try:
+                c.execute(f"ROLLBACK TO {sp}")
+                c.execute(f"RELEASE {sp}")
+            except sqlite3.Error:
+                pass   # transaction already aborted by SQLite — the outer block will see it
+        else:
+            c.rollback()
         raise
     finally:
-        c.close()
+        _tls.depth -= 1
 
 
 def init_db():
@@ -250,6 +296,12 @@ def init_db():
             dtype      TEXT DEFAULT 'text',
             ts         TEXT DEFAULT (datetime('now'))
         );
+        -- Trim to the newest 50 every 16th insert rather than on every save
+        CREATE TRIGGER IF NOT EXISTS clipboard_trim AFTER INSERT ON clipboard
+            WHEN NEW.id % 16 = 0
+        BEGIN
+            DELETE FROM clipboard WHERE id <= NEW.id - 50;
+        END;
 
         -- Browser command queue (Friday → Extension)
         CREATE TABLE IF NOT EXISTS browser_queue (
@@ -269,28 +321,199 @@ def init_db():
         CREATE INDEX IF NOT EXISTS idx_facts_cat    ON facts(category);
         CREATE INDEX IF NOT EXISTS idx_reminders_due ON reminders(due_time);
         CREATE INDEX IF NOT EXISTS idx_bq_status    ON browser_queue(status);
+
+        -- Partial indexes matching the hot WHERE clauses exactly
+        CREATE INDEX IF NOT EXISTS idx_history_undo ON history(ts DESC)
+            WHERE undo_cmd IS NOT NULL AND undone=0 AND success=1;
+        CREATE INDEX IF NOT EXISTS idx_reminders_pending ON reminders(due_time) WHERE done=0;
         """)
+        _init_fts(c)
+        c.execute("PRAGMA optimize")   # refresh planner stats where they are stale — cheap when not
+
+
+# ── Full-text search ───────────────────────────────────────────────────────────
+# Trigram FTS5 indexes keep the substring semantics of the old LIKE '%q%' scans
+# while letting SQLite probe an index instead of lowering every row.
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS facts_fts    USING fts5(content, content='facts', content_rowid='id', tokenize='trigram');
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts    USING fts5(title, content, content='notes', content_rowid='id', tokenize='trigram');
+CREATE VIRTUAL TABLE IF NOT EXISTS snippets_fts USING fts5(name, content='snippets', content_rowid='id', tokenize='trigram');
+
+CREATE TRIGGER IF NOT EXISTS facts_ai AFTER INSERT ON facts BEGIN
+    INSERT INTO facts_fts(rowid,content) VALUES(new.id,new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS facts_ad AFTER DELETE ON facts BEGIN
+    INSERT INTO facts_fts(facts_fts,rowid,content) VALUES('delete',old.id,old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS facts_au AFTER UPDATE OF content ON facts BEGIN
+    INSERT INTO facts_fts(facts_fts,rowid,content) VALUES('delete',old.id,old.content);
+    INSERT INTO facts_fts(rowid,content) VALUES(new.id,new.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS notes_ai AFTER INSERT ON notes BEGIN
+    INSERT INTO notes_fts(rowid,title,content) VALUES(new.id,new.title,new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS notes_ad AFTER DELETE ON notes BEGIN
+    INSERT INTO notes_fts(notes_fts,rowid,title,content) VALUES('delete',old.id,old.title,old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS notes_au AFTER UPDATE OF title,content ON notes BEGIN
+    INSERT INTO notes_fts(notes_fts,rowid,title,content) VALUES('delete',old.id,old.title,old.content);
+    INSERT INTO notes_fts(rowid,title,content) VALUES(new.id,new.title,new.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS snippets_ai AFTER INSERT ON snippets BEGIN
+    INSERT INTO snippets_fts(rowid,name) VALUES(new.id,new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS snippets_ad AFTER DELETE ON snippets BEGIN
+    INSERT INTO snippets_fts(snippets_fts,rowid,name) VALUES('delete',old.id,old.name);
+END;
+CREATE TRIGGER IF NOT EXISTS snippets_au AFTER UPDATE OF name ON snippets BEGIN
+    INSERT INTO snippets_fts(snippets_fts,rowid,name) VALUES('delete',old.id,old.name);
+    INSERT INTO snippets_fts(rowid,name) VALUES(new.id,new.name);
+END;
+"""
+
+_FTS = None   # None = not checked yet; False when this SQLite lacks FTS5 / trigram
+
+def _init_fts(c):
+    """Create the FTS tables + sync triggers, backfilling them the first time."""
+    global _FTS
+    fresh = not c.execute("SELECT 1 FROM sqlite_master WHERE name='facts_fts'").fetchone()
+    try:
+        c.executescript(_FTS_SCHEMA)
+        if fresh:
+            for t in ("facts_fts", "notes_fts", "snippets_fts"):
+                c.execute(f"INSERT INTO {t}({t}) VALUES('rebuild')")
+        _FTS = True
+    except sqlite3.OperationalError:
+        _FTS = False
+
+def _fts_query(q):
+    """FTS5 MATCH string for a substring search, or None when LIKE must be used.
+    Trigrams need 3+ characters, and LIKE wildcards in q have no MATCH equivalent."""
+    global _FTS
+    if _FTS is None:
+        with conn() as c:
+            _FTS = bool(c.execute("SELECT 1 FROM sqlite_master WHERE name='facts_fts'").fetchone())
+    if not _FTS or len(q) < 3 or "%" in q or "_" in q:
+        return None
+    return '"' + q.replace('"', '""') + '"'
 
 
 # ── History ────────────────────────────────────────────────────────────────────
 
+_INSERT_HISTORY = ("INSERT INTO history(user_input,tool,cmd,risk,success,output,undo_cmd,duration_ms,arm)"
+                   " VALUES(?,?,?,?,?,?,?,?,?)")
+
 def log_cmd(user_input, tool, cmd, risk, success, output, undo=None, ms=0, arm="cmd"):
     with conn() as c:
         cur = c.execute(
-            "INSERT INTO history(user_input,tool,cmd,risk,success,output,undo_cmd,duration_ms,arm) VALUES(?,?,?,?,?,?,?,?,?)",
+            _INSERT_HISTORY,
             (user_input, tool, cmd, risk, int(success), str(output)[:3000], undo, ms, arm)
         )
         return cur.lastrowid
 
-def get_history(limit=20, arm=None):
+
+# Tool dispatch logs through a background writer so the chat path never waits on
+# a commit; queued rows are written in batches, one transaction per batch.
+_LOG_Q      = queue.Queue(maxsize=4096)
+_LOG_BATCH  = 128
+_LOG_RETRY  = (0.1, 0.5, 2.0)   # backoff before each retry of a failed batch
+_log_thread = None
+_log_lock   = threading.Lock()
+
+def _log_worker():
+    while True:
+        rows = [_LOG_Q.get()]
+        while len(rows) < _LOG_BATCH:
+            try: rows.append(_LOG_Q.get_nowait())
+            except queue.Empty: break
+        try:
+            _write_log_batch(rows)
+        finally:
+            for _ in rows: _LOG_Q.task_done()
+
+def _write_log_batch(rows):
+    """Insert a batch of history rows, retrying with backoff, then row by row.
+    Rows carry undo commands, so a dropped row is always logged, never silent."""
+    for delay in (*_LOG_RETRY, None):
+        try:
+            with conn() as c:
+                c.executemany(_INSERT_HISTORY, rows)
+            return
+        except Exception as e:
+            if delay is None:
+                log.warning(f"history batch of {len(rows)} failed ({e}); writing row by row")
+                break
+            time.sleep(delay)
+    for row in rows:
+        try:
+            with conn() as c:
+                c.execute(_INSERT_HISTORY, row)
+        except Exception as e:
+            # never take the writer down — but leave a trace of what was lost
+            log.error(f"dropped history row tool={row[1]!r} undo={row[6]!r}: {e}")
+
+def log_cmd_async(user_input, tool, cmd, risk, success, output, undo=None, ms=0, arm="cmd"):
+    """Queue a history row for the background writer; inserts directly if the queue is full."""
+    global _log_thread
+    if _log_thread is None:
+        with _log_lock:
+            if _log_thread is None:
+                _log_thread = threading.Thread(target=_log_worker, name="friday-log", daemon=True)
+                _log_thread.start()
+    try:
+        _LOG_Q.put_nowait((user_input, tool, cmd, risk, int(success), str(output)[:3000], undo, ms, arm))
+    except queue.Full:
+        log_cmd(user_input, tool, cmd, risk, success, output, undo, ms, arm)
+
+def flush_log():
+    """Block until every queued history row has been written."""
+    if _log_thread is not None:
+        _LOG_Q.join()
+
+atexit.register(flush_log)
+
+def iter_history(limit=None, arm=None, raw=False):
+    """Yield history rows newest first, straight off the cursor — dicts, or plain tuples if raw.
+    Read-only, so it runs outside conn() and never holds a write transaction open."""
+    flush_log()
+    cur = _thread_conn().cursor()
+    if raw: cur.row_factory = None
+    lim = -1 if limit is None else limit
+    if arm:
+        cur.execute("SELECT * FROM history WHERE arm=? ORDER BY ts DESC LIMIT ?", (arm, lim))
+    else:
+        cur.execute("SELECT * FROM history ORDER BY ts DESC LIMIT ?", (lim,))
+    if raw:
+        yield from cur
+    else:
+        for r in cur: yield dict(r)
+
+def get_history(limit=20, arm=None, raw=False):
+    return list(iter_history(limit, arm, raw))
+
+def count_history_since(since):
+    """Number of history rows with ts >= since ('YYYY-MM-DD HH:MM:SS') — served by idx_history_ts."""
+    flush_log()
+    with conn() as c:
+        return c.execute("SELECT COUNT(*) FROM history WHERE ts >= ?", (since,)).fetchone()[0]
+
+def get_history_lines(limit=20, arm=None):
+    """History rows pre-formatted by SQLite as '  ✓ [HH:MM] [arm] input'."""
+    flush_log()
+    sql = ("SELECT printf('  %s [%s] [%s] %s', CASE WHEN success THEN '✓' ELSE '✗' END,"
+           " substr(ts,12,5), arm, substr(user_input,1,50)) FROM history")
     with conn() as c:
         if arm:
-            rows = c.execute("SELECT * FROM history WHERE arm=? ORDER BY ts DESC LIMIT ?", (arm, limit)).fetchall()
+            rows = c.execute(sql + " WHERE arm=? ORDER BY ts DESC LIMIT ?", (arm, limit)).fetchall()
         else:
-            rows = c.execute("SELECT * FROM history ORDER BY ts DESC LIMIT ?", (limit,)).fetchall()
-        return [dict(r) for r in rows]
+            rows = c.execute(sql + " ORDER BY ts DESC LIMIT ?", (limit,)).fetchall()
+        return [r[0] for r in rows]
 
 def get_undoable():
+    flush_log()
     with conn() as c:
         rows = c.execute(
             "SELECT * FROM history WHERE undo_cmd IS NOT NULL AND undone=0 AND success=1 ORDER BY ts DESC LIMIT 10"
@@ -392,7 +615,7 @@ def get_session(name):
         r = c.execute("SELECT * FROM browser_sessions WHERE name=?", (name,)).fetchone()
         if r:
             d = dict(r)
-            d["steps"] = json.loads(d["steps"])
+            d["steps"] = _loads(d["steps"])
             return d
         return None
 
@@ -422,9 +645,11 @@ def list_aliases():
     with conn() as c:
         return [dict(r) for r in c.execute("SELECT * FROM aliases ORDER BY run_count DESC").fetchall()]
 
+_BUMP_ALIAS = "UPDATE aliases SET run_count=run_count+1 WHERE name=?"
+
 def bump_alias(name):
     with conn() as c:
-        c.execute("UPDATE aliases SET run_count=run_count+1 WHERE name=?", (name,))
+        c.execute(_BUMP_ALIAS, (name,))
 
 
 # ── Reminders ──────────────────────────────────────────────────────────────────
@@ -477,11 +702,12 @@ def add_goal(title, description="", steps=None):
         return cur.lastrowid
 
 def update_goal(gid, progress=None, status=None):
+    status = status or None
+    if progress is None and status is None:
+        return
     with conn() as c:
-        if progress is not None:
-            c.execute("UPDATE goals SET progress=?,updated_at=datetime('now') WHERE id=?", (progress, gid))
-        if status:
-            c.execute("UPDATE goals SET status=?,updated_at=datetime('now') WHERE id=?", (status, gid))
+        c.execute("UPDATE goals SET progress=COALESCE(?,progress),status=COALESCE(?,status),"
+                  "updated_at=datetime('now') WHERE id=?", (progress, status, gid))
 
 def list_goals(status="active"):
     with conn() as c:
@@ -495,7 +721,13 @@ def add_fact(content, category="general", importance=1.0):
         c.execute("INSERT INTO facts(content,category,importance) VALUES(?,?,?)", (content, category, importance))
 
 def search_facts(query):
+    m = _fts_query(query)
     with conn() as c:
+        if m:
+            return [dict(r) for r in c.execute(
+                "SELECT * FROM facts WHERE id IN (SELECT rowid FROM facts_fts WHERE facts_fts MATCH ?)"
+                " ORDER BY importance DESC LIMIT 10", (m,)
+            ).fetchall()]
         return [dict(r) for r in c.execute(
             "SELECT * FROM facts WHERE LOWER(content) LIKE LOWER(?) ORDER BY importance DESC LIMIT 10",
             (f"%{query}%",)
@@ -516,7 +748,12 @@ def list_notes():
         return [dict(r) for r in c.execute("SELECT * FROM notes ORDER BY updated_at DESC LIMIT 20").fetchall()]
 
 def search_notes(query):
+    m = _fts_query(query)
     with conn() as c:
+        if m:
+            return [dict(r) for r in c.execute(
+                "SELECT * FROM notes WHERE id IN (SELECT rowid FROM notes_fts WHERE notes_fts MATCH ?)", (m,)
+            ).fetchall()]
         return [dict(r) for r in c.execute(
             "SELECT * FROM notes WHERE LOWER(title) LIKE LOWER(?) OR LOWER(content) LIKE LOWER(?)",
             (f"%{query}%", f"%{query}%")
@@ -571,21 +808,42 @@ def get_pending_browser_cmds():
         rows = c.execute("SELECT * FROM browser_queue WHERE status='pending' ORDER BY id").fetchall()
         return [dict(r) for r in rows]
 
+# cmd_id → Event for get_browser_result callers waiting in this process
+_browser_waiters = {}
+_browser_lock    = threading.Lock()
+_BROWSER_REPOLL  = 2.0   # fallback re-check in case the row is updated by another process
+
 def update_browser_cmd(cmd_id, status, result=None):
     with conn() as c:
         c.execute("UPDATE browser_queue SET status=?,result=?,updated_at=datetime('now') WHERE id=?",
                   (status, result, cmd_id))
+    try:
+        with _browser_lock:
+            ev = _browser_waiters.get(int(cmd_id))
+    except (TypeError, ValueError):
+        ev = None
+    if ev: ev.set()
 
 def get_browser_result(cmd_id, timeout=30):
-    """Poll for browser command result."""
-    import time
-    start = time.time()
-    while time.time() - start < timeout:
-        with conn() as c:
-            r = c.execute("SELECT * FROM browser_queue WHERE id=?", (cmd_id,)).fetchone()
+    """Wait for a browser command result — woken by update_browser_cmd instead of polling."""
+    ev = threading.Event()
+    with _browser_lock:
+        _browser_waiters[cmd_id] = ev   # registered before the first read, so no update is missed
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            ev.clear()
+            with conn() as c:
+                r = c.execute("SELECT * FROM browser_queue WHERE id=?", (cmd_id,)).fetchone()
             if r and r["status"] in ("done", "error"):
                 return dict(r)
-        time.sleep(0.4)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            ev.wait(min(remaining, _BROWSER_REPOLL))
+    finally:
+        with _browser_lock:
+            _browser_waiters.pop(cmd_id, None)
     return {"status": "timeout", "result": "Browser did not respond in time"}
 
 
@@ -617,8 +875,13 @@ def save_snippet(name, content, language="text", tags=None):
                   (name, language, content, json.dumps(tags or [])))
 
 def get_snippet(name):
+    m = _fts_query(name)
     with conn() as c:
-        r = c.execute("SELECT * FROM snippets WHERE LOWER(name) LIKE LOWER(?)", (f"%{name}%",)).fetchone()
+        if m:
+            r = c.execute("SELECT * FROM snippets WHERE id IN (SELECT rowid FROM snippets_fts WHERE snippets_fts MATCH ?)"
+                          " LIMIT 1", (m,)).fetchone()
+        else:
+            r = c.execute("SELECT * FROM snippets WHERE LOWER(name) LIKE LOWER(?)", (f"%{name}%",)).fetchone()
         return dict(r) if r else None
 
 def list_snippets():
@@ -628,10 +891,12 @@ def list_snippets():
 
 # ── Clipboard history ──────────────────────────────────────────────────────────
 
+_INSERT_CLIP = "INSERT INTO clipboard(content,dtype) VALUES(?,?)"
+
 def save_clipboard(content, dtype="text"):
+    # Old entries are trimmed by the clipboard_trim trigger (see init_db)
     with conn() as c:
-        c.execute("INSERT INTO clipboard(content,dtype) VALUES(?,?)", (content, dtype))
-        c.execute("DELETE FROM clipboard WHERE id NOT IN (SELECT id FROM clipboard ORDER BY ts DESC LIMIT 50)")
+        c.execute(_INSERT_CLIP, (content, dtype))
 
 def list_clipboard(limit=10):
     with conn() as c:
@@ -650,29 +915,35 @@ def get_pref(key, default=None):
     with conn() as c:
         r = c.execute("SELECT value FROM prefs WHERE key=?", (key,)).fetchone()
         if r:
-            try: return json.loads(r["value"])
+            try: return _loads(r["value"])
             except: return r["value"]
         return default
 
 
 # ── Stats ──────────────────────────────────────────────────────────────────────
 
+# (key, scalar subquery) — db_stats() reads all of them in one statement
+_STATS = (
+    ("commands",       "SELECT COUNT(*) FROM history"),
+    ("success_rate",   "SELECT AVG(success)*100 FROM history"),
+    ("wifi_saved",     "SELECT COUNT(*) FROM wifi"),
+    ("bt_devices",     "SELECT COUNT(*) FROM bluetooth"),
+    ("facts",          "SELECT COUNT(*) FROM facts"),
+    ("notes",          "SELECT COUNT(*) FROM notes"),
+    ("reminders",      "SELECT COUNT(*) FROM reminders WHERE done=0"),
+    ("goals",          "SELECT COUNT(*) FROM goals WHERE status='active'"),
+    ("aliases",        "SELECT COUNT(*) FROM aliases"),
+    ("habits_learned", "SELECT COUNT(*) FROM habits"),
+    ("credentials",    "SELECT COUNT(*) FROM credentials"),
+    ("sessions",       "SELECT COUNT(*) FROM browser_sessions"),
+    ("snippets",       "SELECT COUNT(*) FROM snippets"),
+)
+_STATS_SQL = "SELECT " + ", ".join(f"({q})" for _, q in _STATS)
+
 def db_stats():
+    flush_log()
     with conn() as c:
-        return {
-            "commands":      c.execute("SELECT COUNT(*) FROM history").fetchone()[0],
-            "success_rate":  "{:.0f}%".format(
-                c.execute("SELECT AVG(success)*100 FROM history").fetchone()[0] or 0),
-            "wifi_saved":    c.execute("SELECT COUNT(*) FROM wifi").fetchone()[0],
-            "bt_devices":    c.execute("SELECT COUNT(*) FROM bluetooth").fetchone()[0],
-            "facts":         c.execute("SELECT COUNT(*) FROM facts").fetchone()[0],
-            "notes":         c.execute("SELECT COUNT(*) FROM notes").fetchone()[0],
-            "reminders":     c.execute("SELECT COUNT(*) FROM reminders WHERE done=0").fetchone()[0],
-            "goals":         c.execute("SELECT COUNT(*) FROM goals WHERE status='active'").fetchone()[0],
-            "aliases":       c.execute("SELECT COUNT(*) FROM aliases").fetchone()[0],
-            "habits_learned":c.execute("SELECT COUNT(*) FROM habits").fetchone()[0],
-            "credentials":   c.execute("SELECT COUNT(*) FROM credentials").fetchone()[0],
-            "sessions":      c.execute("SELECT COUNT(*) FROM browser_sessions").fetchone()[0],
-            "snippets":      c.execute("SELECT COUNT(*) FROM snippets").fetchone()[0],
-            "db_path":       str(DB_PATH),
-        }
+        stats = dict(zip((k for k, _ in _STATS), c.execute(_STATS_SQL).fetchone()))
+    stats["success_rate"] = "{:.0f}%".format(stats["success_rate"] or 0)
+    stats["db_path"] = str(DB_PATH)
+    return stats
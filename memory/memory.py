@@ -14,7 +14,7 @@ from db.database import (
 from dataclasses import dataclass
 from typing import Optional
 
-@dataclass
+@dataclass(slots=True)
 class R:
     ok: bool; out: str
 
@@ -41,11 +41,16 @@ def get_habits_summary() -> str:
     return "Learned habits:\n" + "\n".join(lines)
 
 
+# The only tools infer_preferences can augment — every other dispatch skips it entirely
+_PREF_TOOLS = frozenset({"install_package", "connect_wifi", "set_volume"})
+
 def infer_preferences(user_input: str, tool: str, args: dict) -> dict:
     """
     Augment args with learned preferences before dispatch.
     E.g. always use pip, always connect to HomeNet, etc.
     """
+    if tool not in _PREF_TOOLS:
+        return args
     enhanced = dict(args)
 
     # Package manager preference
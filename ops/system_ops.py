@@ -28,7 +28,7 @@ from db.database import (
 OS = platform.system().lower()  # linux | darwin | windows
 
 
-@dataclass
+@dataclass(slots=True)
 class R:  # OpResult
     ok:   bool
     out:  str
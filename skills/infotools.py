@@ -6,7 +6,7 @@ import subprocess
 import platform
 from dataclasses import dataclass
 
-@dataclass
+@dataclass(slots=True)
 class R:
     ok: bool; out: str; cmd: str = ""
 
@@ -21,7 +21,7 @@ def _get_timeout() -> int:
         _BROWSER_TIMEOUT = int(get_pref("browser_timeout", 30) or 30)
     return _BROWSER_TIMEOUT
 
-@dataclass
+@dataclass(slots=True)
 class R:
     ok: bool; out: str; cmd: str = ""
 
@@ -1,27 +1,26 @@
 """
 Friday Notifier — desktop notifications + anomaly watcher
 """
-import os, time, threading
+import os, time, threading, platform, subprocess
 from dataclasses import dataclass
 from typing import Optional
 
-@dataclass
+@dataclass(slots=True)
 class R:
     ok: bool; out: str
 
 
+OS     = platform.system().lower()   # resolved once, not per notification
+_ICONS = {"normal": "dialog-information", "critical": "dialog-warning", "low": "dialog-information"}
+
+
 def _notify(title, message, urgency="normal"):
     """Send desktop notification cross-platform."""
-    import platform
-    OS = platform.system().lower()
     try:
         if OS == "linux":
-            import subprocess
-            icons = {"normal": "dialog-information", "critical": "dialog-warning", "low": "dialog-information"}
-            subprocess.Popen(["notify-send", "-u", urgency, "-i", icons.get(urgency,"dialog-information"), title, message])
+            subprocess.Popen(["notify-send", "-u", urgency, "-i", _ICONS.get(urgency,"dialog-information"), title, message])
             return True
         elif OS == "darwin":
-            import subprocess
             subprocess.Popen(["osascript", "-e", f'display notification "{message}" with title "{title}"'])
             return True
         else:
@@ -87,7 +86,6 @@ class ProcessWatcher(threading.Thread):
         self._stop    = threading.Event()
 
     def run(self):
-        import subprocess
         from db.database import list_watchers, add_watcher
         while not self._stop.wait(self.interval):
             try:
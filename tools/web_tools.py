@@ -6,27 +6,39 @@ Search, weather, page fetch, stocks, wiki, calculator, currency, QR, API tester
 import re
 import json
 import math
+import time
 from typing import Optional
+from functools import lru_cache
 from dataclasses import dataclass
 
-@dataclass
+@dataclass(slots=True)
 class R:
     ok:  bool
     out: str
     cmd: str = ""
 
 
+_session = None
+
+def _http():
+    """One shared requests.Session — pooled keep-alive connections, no TLS handshake per call."""
+    global _session
+    if _session is None:
+        import requests
+        _session = requests.Session()
+        _session.headers["User-Agent"] = "FridayAI/1.0"
+    return _session
+
+
 def _req(url, params=None, headers=None, method="GET", body=None, timeout=12):
     try:
-        import requests
-        h = {"User-Agent": "FridayAI/1.0"}
-        if headers: h.update(headers)
+        s = _http()
         if method == "GET":
-            r = requests.get(url, params=params, headers=h, timeout=timeout)
+            r = s.get(url, params=params, headers=headers, timeout=timeout)
         elif method == "POST":
-            r = requests.post(url, params=params, headers=h, json=body, timeout=timeout)
+            r = s.post(url, params=params, headers=headers, json=body, timeout=timeout)
         else:
-            r = requests.request(method, url, params=params, headers=h, json=body, timeout=timeout)
+            r = s.request(method, url, params=params, headers=headers, json=body, timeout=timeout)
         r.raise_for_status()
         return True, r
     except Exception as e:
@@ -112,11 +124,18 @@ def get_datetime(timezone=None):
                     f"  Week : {now.isocalendar()[1]} of {now.year}"), "datetime")
 
 
+_CALC_NS = {k: getattr(math, k) for k in dir(math) if not k.startswith("_")}
+_CALC_NS.update({"abs":abs,"round":round,"int":int,"float":float,"sum":sum,"min":min,"max":max,"len":len})
+
+@lru_cache(maxsize=128)
+def _calc_code(expression):
+    """Compile once per distinct expression; repeats skip parsing entirely."""
+    return compile(expression, "<string>", "eval")
+
 def calculate(expression):
-    safe = {k: getattr(math, k) for k in dir(math) if not k.startswith("_")}
-    safe.update({"abs":abs,"round":round,"int":int,"float":float,"sum":sum,"min":min,"max":max,"len":len})
     try:
-        result = eval(expression, {"__builtins__": {}}, safe)  # noqa: S307
+        # Fresh copy per call — walrus targets land in locals and must not leak into later calls
+        result = eval(_calc_code(expression), {"__builtins__": {}}, dict(_CALC_NS))  # noqa: S307
         return R(True, f"🧮 {expression} = {result}", "calc")
     except Exception as e:
         return R(False, f"Calc error: {e}", "calc")
@@ -145,10 +164,22 @@ def wikipedia(topic):
     return R(True, f"📖 {d.get('title',topic)}\n{d.get('extract','No summary.')[:600]}", "wiki")
 
 
-def convert_currency(amount, from_cur, to_cur):
-    ok, r = _req(f"https://open.er-api.com/v6/latest/{from_cur.upper()}")
-    if not ok: return R(False, f"Currency API error: {r}", "currency")
+_RATES_TTL = 300
+_rates_memo = {}   # base currency → (expiry, rates) — one fetch serves every target/amount
+
+def _rates(base):
+    hit = _rates_memo.get(base)
+    if hit and hit[0] > time.monotonic():
+        return True, hit[1]
+    ok, r = _req(f"https://open.er-api.com/v6/latest/{base}")
+    if not ok: return False, r
     rates = r.json().get("rates",{})
+    if rates: _rates_memo[base] = (time.monotonic() + _RATES_TTL, rates)
+    return True, rates
+
+def convert_currency(amount, from_cur, to_cur):
+    ok, rates = _rates(from_cur.upper())
+    if not ok: return R(False, f"Currency API error: {rates}", "currency")
     rate = rates.get(to_cur.upper())
     if not rate: return R(False, f"Unknown currency: {to_cur}", "currency")
     result = round(float(amount) * rate, 4)